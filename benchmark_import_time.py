@@ -0,0 +1,137 @@
+import argparse
+import os
+import subprocess
+import sys
+
+"""
+Import-time regression check.
+
+Importing a module must be cheap and side-effect free - a service that
+imports KeyValueStore shouldn't pay for demo code sleeping at module level.
+
+Every importable module under problems/ and algorithms/ is imported in a
+fresh interpreter (so nothing is already cached) and timed. The script
+exits with status 1 if any module takes longer than the budget.
+
+Usage:
+    python benchmark_import_time.py [--budget SECONDS]
+
+Each module's own directory is appended to sys.path, so script-style sibling
+imports (`from DFS_PreOrder import ...`) resolve the way they do when the file
+is run directly.
+
+A module that fails to import is an error and fails the run too - except a
+ModuleNotFoundError for a name that doesn't exist anywhere in the repo (a
+missing third-party dependency such as `requests`), which is listed as a skip.
+"""
+
+PACKAGES = ("problems", "algorithms")
+
+_TIMER = """
+import importlib, sys, time
+sys.path.append(sys.argv[2])
+start = time.perf_counter()
+try:
+    importlib.import_module(sys.argv[1])
+except ModuleNotFoundError as exc:
+    sys.stdout.write("\\n__missing_module__=%s\\n" % exc.name)
+    raise
+sys.stdout.write("\\n__import_seconds__=%f\\n" % (time.perf_counter() - start))
+"""
+
+
+def discover_modules(root):
+    """
+    Dotted names of every .py module reachable as a package import
+    (directories with spaces etc. can't be imported, so they are skipped).
+    """
+    modules = []
+
+    for package in PACKAGES:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, package)):
+            rel_parts = os.path.relpath(dirpath, root).split(os.sep)
+            if not all(part.isidentifier() for part in rel_parts):
+                dirnames[:] = []
+                continue
+
+            dirnames[:] = sorted(d for d in dirnames if d.isidentifier())
+
+            for filename in sorted(filenames):
+                name, ext = os.path.splitext(filename)
+                if ext != ".py" or not name.isidentifier():
+                    continue
+                parts = rel_parts if name == "__init__" else rel_parts + [name]
+                modules.append(".".join(parts))
+
+    return modules
+
+
+def _in_repo(name, search_dirs):
+    """
+    True if the top-level name of a missing module is a file/package we ship.
+    """
+    top = name.split(".")[0]
+    return any(
+        os.path.exists(os.path.join(directory, top)) or os.path.exists(os.path.join(directory, top + ".py"))
+        for directory in search_dirs
+    )
+
+
+def time_import(module, root, timeout):
+    """
+    Returns (seconds, None, None) on success, (None, error summary, None) on
+    failure, or (None, None, missing dependency) for a third-party skip.
+    """
+    module_dir = os.path.join(root, *module.split(".")[:-1])
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", _TIMER, module, module_dir],
+            cwd=root, capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return timeout, None, None
+
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("__import_seconds__="):
+            return float(line.split("=", 1)[1]), None, None
+        if line.startswith("__missing_module__="):
+            missing = line.split("=", 1)[1]
+            if not _in_repo(missing, (root, module_dir)):
+                return None, None, missing
+            break
+
+    last_error = result.stderr.strip().splitlines()
+    return None, last_error[-1] if last_error else f"exit code {result.returncode}", None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time regression check")
+    parser.add_argument("--budget", type=float, default=0.5, help="max seconds per module import")
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    over_budget, errors, skipped = [], [], []
+
+    for module in discover_modules(root):
+        seconds, error, missing = time_import(module, root, timeout=max(10.0, args.budget * 10))
+
+        if missing is not None:
+            skipped.append((module, missing))
+            print(f"  skip  {module}: third-party dependency {missing!r} not installed")
+        elif error is not None:
+            errors.append((module, error))
+            print(f"  FAIL  {module}: {error}")
+        elif seconds > args.budget:
+            over_budget.append((module, seconds))
+            print(f"  SLOW  {module}: {seconds:.3f}s")
+        else:
+            print(f"  ok    {module}: {seconds:.3f}s")
+
+    print(f"\n{len(over_budget)} module(s) over the {args.budget:.2f}s budget, "
+          f"{len(errors)} failed to import, {len(skipped)} skipped (missing dependency)")
+
+    return 1 if over_budget or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
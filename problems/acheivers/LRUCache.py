@@ -17,22 +17,97 @@ So I need:
 ⏱ Complexity
     get / put: O(1)
     Space: O(capacity)
+
+⚖️ Weighted capacity (LRUCache(capacity, weigher=..., on_evict=...))
+    Values of 100 B and 5 MB shouldn't count the same. With a weigher
+    (key, value) -> weight, capacity is a budget of total weight (e.g. bytes)
+    instead of an entry count (the default: every entry weighs 1).
+    - One put may evict MANY tail entries: keep unlinking the tail until
+      the total weight fits again - one pass, O(evicted)
+    - A value heavier than the whole capacity is not cached at all (instead
+      of flushing every other entry for nothing)
+    - on_evict(key, value) runs for every evicted entry after the cache is
+      consistent again - spill to disk, close handles, ...
+
+📦 Compact variant (CompactLRUCache)
+    One Node per entry is a full Python object with its own attribute
+    storage, and every move is ~8 pointer writes interpreted one by one.
+
+    OrderedDict already IS "hash map + doubly linked list", in C:
+        move_to_end(key)      -> move-to-front
+        popitem(last=False)   -> evict the tail
+    Its links are C structs, not Python objects.
+
+    ❓ Why not prev/next indices in array('l') columns?
+        Every index stored in the dict is still a boxed int (28 B),
+        and each array read/write boxes again - it measured larger per
+        entry and slower on get than OrderedDict.
+
+🧵 Concurrent variant (ConcurrentLRUCache)
+    get() REORDERS the list, so every read is a write - sharing one cache
+    between threads means one lock that every reader contends on.
+
+    1. Segments: hash(key) picks one of N independently locked LRUs
+       (capacity split evenly) - writers on different segments never meet
+    2. Read buffers (Caffeine-style): a hit reads the dict WITHOUT the lock
+       and only records the key in this thread's buffer for that segment.
+       When the buffer fills, the thread TRY-locks the segment and replays
+       the hits as move_to_end in one batch; if the lock is busy the buffer
+       is dropped - recency is a hint, losing a few hits only makes the
+       eviction order slightly less exact.
+    3. Writes take the segment lock and drain the caller's buffer first.
+
+    ⚠️ Lock-free dict reads rely on the GIL making a single dict operation
+       atomic.
+
+🛡 Scan-resistant variant (TinyLFUCache, W-TinyLFU - Einziger et al. 2017)
+    A one-off scan of N > capacity keys pushes every hot key out of a plain
+    LRU, and the cache is cold until the hot set is re-read.
+
+    Keep recency, but make entry into the bulk of the cache earn its place:
+        window LRU (~1%)  ->  [admission filter]  ->  main SLRU (~99%)
+                                                     probation (20%) / protected (80%)
+    - Every new key enters the small window LRU (bursts still hit)
+    - A key falling out of the window is a candidate; it replaces the main
+      LRU's victim ONLY if it was seen more often (count-min sketch estimate)
+    - Main is segmented: a hit in probation promotes to protected; protected
+      overflow demotes back to probation, so one hit doesn't make an entry hot
+    - Sketch: 4 rows of small counters, estimate = min over rows. Every
+      10 * capacity increments all counters are halved (aging), so yesterday's
+      hot keys don't stay "frequent" forever
+
+    A scan's keys are seen once, lose to the victims' frequency and only
+    ever churn the 1% window.
 """
 
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+_MISSING = object()
+
 
 class Node:
-    def __init__(self, key, value):
+    def __init__(self, key, value, weight=1):
         self.key = key
         self.value = value
+        self.weight = weight
         self.prev: Node = None
         self.next: Node = None
 
 
 class LRUCache:
-    def __init__(self, capacity):
+    def __init__(self, capacity, weigher=None, on_evict=None):
+        # Max total weight; with no weigher every entry weighs 1 (= entry count)
         self.capacity = capacity
+        self.weigher = weigher
+        self.on_evict = on_evict
 
         self.cache = {}
+        self.total_weight = 0
 
         # Dummy head and tail to avoid null-checks
         self.head = Node(0, 0)
@@ -73,20 +148,46 @@ class LRUCache:
         return node.value
 
     def put(self, key: int, value: int):
+        weight = self.weigher(key, value) if self.weigher else 1
+
+        if weight > self.capacity:
+            # Can never fit: don't flush the whole cache for it. The rejected
+            # value was never cached, so it isn't an eviction - but the value
+            # it was meant to replace is gone now, and that one is.
+            stale: Node = self.cache.pop(key, None)
+            if stale is not None:
+                self._remove(stale)
+                self.total_weight -= stale.weight
+                if self.on_evict:
+                    self.on_evict(key, stale.value)
+            return
+
         if key in self.cache:
             node: Node = self.cache[key]
+            self.total_weight += weight - node.weight
+            node.value = value
+            node.weight = weight
             self._remove(node)
             self._add_to_front(node)
         else:
-            node: Node = Node(key=key, value=value)
+            node: Node = Node(key=key, value=value, weight=weight)
             self.cache[key] = node
             self._add_to_front(node)
+            self.total_weight += weight
 
-            # special case --> if capacity exceeded
-            if len(self.cache) > self.capacity:
-                node_to_remove = self.tail.prev
-                self._remove(node=node_to_remove)
-                del self.cache[node_to_remove.key]
+        # special case --> if capacity exceeded: evict from the tail until it fits
+        # (never reaches the new node, since weight <= capacity)
+        evicted = []
+        while self.total_weight > self.capacity:
+            node_to_remove = self.tail.prev
+            self._remove(node=node_to_remove)
+            del self.cache[node_to_remove.key]
+            self.total_weight -= node_to_remove.weight
+            evicted.append(node_to_remove)
+
+        if self.on_evict:
+            for node_evicted in evicted:
+                self.on_evict(node_evicted.key, node_evicted.value)
 
     @staticmethod
     def run_tests():
@@ -105,5 +206,519 @@ class LRUCache:
         print(lru.get(3))  # 3
         print(lru.get(4))  # 4
 
+        lru.put(3, 30)  # update in place
+        print(lru.get(3))  # 30
+
+        print("\n-- Weighted by bytes + on_evict --")
+        spilled = []
+        lru = LRUCache(1_000, weigher=lambda key, value: len(value),
+                       on_evict=lambda key, value: spilled.append(key))
+        for key in "abcd":
+            lru.put(key, b"x" * 200)  # 800 bytes
+        lru.put("big", b"x" * 700)  # evicts a, b, c in one pass
+        print(spilled, lru.total_weight)  # ['a', 'b', 'c'] 900
+        lru.put("huge", b"x" * 5_000)  # bigger than capacity: not cached, not "evicted"
+        print(lru.get("huge"), spilled, lru.total_weight)  # -1 ['a', 'b', 'c'] 900
+        lru.put("big", b"x" * 5_000)  # replaces big: the cached 700 bytes are evicted
+        print(lru.get("big"), spilled[-1], lru.total_weight)  # -1 big 200
+
+
+class CompactLRUCache:
+    """
+    Same API as LRUCache, no per-entry Python objects.
+    """
+
+    __slots__ = ("capacity", "cache")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+        # Insertion order == recency order: first item is the LRU, last the MRU
+        self.cache = OrderedDict()
+
+    def get(self, key: int) -> int:
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            return -1
+
+        self.cache.move_to_end(key)
+        return value
+
+    def put(self, key: int, value: int):
+        cache = self.cache
+
+        if key in cache:
+            cache.move_to_end(key)
+        elif len(cache) >= self.capacity:
+            if self.capacity <= 0:
+                return
+            cache.popitem(last=False)
+
+        cache[key] = value
+
+    @staticmethod
+    def run_tests():
+        print("=== COMPACT LRU CACHE TESTS ===")
+
+        lru = CompactLRUCache(2)
+        lru.put(1, 1)
+        lru.put(2, 2)
+
+        print(lru.get(1))  # 1
+        lru.put(3, 3)  # evicts 2
+        print(lru.get(2))  # -1
+
+        lru.put(4, 4)  # evicts 1
+        print(lru.get(1))  # -1
+        print(lru.get(3))  # 3
+        print(lru.get(4))  # 4
+
+        lru.put(3, 30)  # update in place
+        print(lru.get(3))  # 30
+
+
+class _LRUSegment:
+    __slots__ = ("capacity", "cache", "lock")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+
+class ConcurrentLRUCache:
+    """
+    Thread-safe LRUCache: locked segments + per-thread read buffers.
+    Eviction is LRU per segment (approximate LRU overall).
+    """
+
+    def __init__(self, capacity, num_segments: int = 16, read_buffer_size: int = 32):
+        self.capacity = capacity
+        self.read_buffer_size = read_buffer_size
+
+        # No more segments than entries: a 0-capacity segment would never
+        # cache the keys that hash to it
+        num_segments = max(1, min(num_segments, capacity))
+
+        # Split capacity evenly; the first `extra` segments take one more
+        per_segment, extra = divmod(capacity, num_segments)
+        self.segments = [_LRUSegment(per_segment + (i < extra)) for i in range(num_segments)]
+
+        # thread -> [pending hit keys per segment]
+        self._local = threading.local()
+
+    def _segment_index(self, key) -> int:
+        return hash(key) % len(self.segments)
+
+    def _read_buffer(self, index: int) -> list:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = [[] for _ in self.segments]
+        return buffers[index]
+
+    @staticmethod
+    def _replay(segment: _LRUSegment, buffer: list):
+        """
+        Apply buffered hits in order. Caller holds segment.lock.
+        """
+        cache = segment.cache
+        for key in buffer:
+            if key in cache:  # may have been evicted since the read
+                cache.move_to_end(key)
+        buffer.clear()
+
+    def get(self, key: int) -> int:
+        index = self._segment_index(key)
+        segment = self.segments[index]
+
+        value = segment.cache.get(key, _MISSING)
+        if value is _MISSING:
+            return -1
+
+        buffer = self._read_buffer(index)
+        buffer.append(key)
+
+        if len(buffer) >= self.read_buffer_size:
+            if segment.lock.acquire(blocking=False):
+                try:
+                    self._replay(segment, buffer)
+                finally:
+                    segment.lock.release()
+            else:
+                buffer.clear()
+
+        return value
+
+    def put(self, key: int, value: int):
+        index = self._segment_index(key)
+        segment = self.segments[index]
+
+        with segment.lock:
+            # Our pending hits happened before this write
+            self._replay(segment, self._read_buffer(index))
+
+            cache = segment.cache
+            if key in cache:
+                cache.move_to_end(key)
+            elif len(cache) >= segment.capacity:
+                if segment.capacity <= 0:
+                    return
+                cache.popitem(last=False)
+
+            cache[key] = value
+
+    def __len__(self):
+        return sum(len(segment.cache) for segment in self.segments)
+
+    @staticmethod
+    def run_tests():
+        print("=== CONCURRENT LRU CACHE TESTS ===")
+
+        # One segment + buffer of 1: behaves exactly like LRUCache
+        lru = ConcurrentLRUCache(2, num_segments=1, read_buffer_size=1)
+        lru.put(1, 1)
+        lru.put(2, 2)
+
+        print(lru.get(1))  # 1
+        lru.put(3, 3)  # evicts 2
+        print(lru.get(2))  # -1
+
+        lru.put(4, 4)  # evicts 1
+        print(lru.get(1))  # -1
+        print(lru.get(3))  # 3
+        print(lru.get(4))  # 4
+
+        # Buffered hit is replayed by the next write on that segment
+        lru = ConcurrentLRUCache(2, num_segments=1, read_buffer_size=32)
+        lru.put(1, 1)
+        lru.put(2, 2)
+        lru.get(1)
+        lru.put(3, 3)  # replays get(1) first -> evicts 2
+        print(lru.get(2), lru.get(1))  # -1 1
+
+        # 8 threads sharing one cache
+        lru = ConcurrentLRUCache(1_000)
+
+        def worker(offset):
+            for i in range(20_000):
+                key = (offset * 7919 + i) % 2_000
+                if lru.get(key) == -1:
+                    lru.put(key, key)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(len(lru) <= 1_000)  # True
+
+        # Fewer entries than segments: still caches every key
+        lru = ConcurrentLRUCache(4)
+        lru.put("x", 1)
+        print(lru.get("x"), len(lru.segments))  # 1 4
+
+
+# byte -> byte >> 1, for halving a whole sketch row with bytes.translate
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counts: 4 rows of 4-bit-range counters (max 15).
+    Overestimates only (hash collisions), never underestimates before aging.
+    """
+
+    __slots__ = ("rows", "mask", "additions", "sample_size")
+
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+    def __init__(self, width: int, sample_size: int):
+        # Power-of-two width so an index is a mask, not a modulo
+        width = 1 << max(4, (width - 1).bit_length())
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in self._SEEDS]
+
+        # Halve every counter after this many increments
+        self.sample_size = sample_size
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        # Multiply-shift per row: independent-enough indexes from one hash
+        return [((h ^ seed) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF) >> 32 & self.mask for seed in self._SEEDS]
+
+    def increment(self, key):
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def _age(self):
+        for row in self.rows:
+            row[:] = row.translate(_HALVE)
+        self.additions //= 2
+
+
+class TinyLFUCache:
+    """
+    Same API as LRUCache, W-TinyLFU eviction.
+    """
+
+    def __init__(self, capacity, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        self.capacity = capacity
+
+        self.window_capacity = max(1, int(capacity * window_ratio)) if capacity > 0 else 0
+        main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(main_capacity * protected_ratio)
+        self.main_capacity = main_capacity
+
+        # Each OrderedDict: first item = LRU, last = MRU
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+
+        self.sketch = CountMinSketch(width=capacity, sample_size=10 * max(1, capacity))
+
+    def _hit(self, key):
+        """
+        Record a hit on a resident key; returns its value or _MISSING.
+        """
+        if key in self.window:
+            self.window.move_to_end(key)
+            return self.window[key]
+
+        if key in self.protected:
+            self.protected.move_to_end(key)
+            return self.protected[key]
+
+        if key in self.probation:
+            # Second chance earned: promote, demoting protected's LRU if full
+            value = self.protected[key] = self.probation.pop(key)
+            if len(self.protected) > self.protected_capacity:
+                demoted_key, demoted_value = self.protected.popitem(last=False)
+                self.probation[demoted_key] = demoted_value
+            return value
+
+        return _MISSING
+
+    def get(self, key: int) -> int:
+        self.sketch.increment(key)
+
+        value = self._hit(key)
+        return -1 if value is _MISSING else value
+
+    def put(self, key: int, value: int):
+        self.sketch.increment(key)
+
+        if self._hit(key) is not _MISSING:
+            for segment in (self.window, self.protected, self.probation):
+                if key in segment:
+                    segment[key] = value
+                    return
+
+        if self.capacity <= 0:
+            return
+
+        self.window[key] = value
+        if len(self.window) > self.window_capacity:
+            self._admit(*self.window.popitem(last=False))
+
+    def _admit(self, candidate_key, candidate_value):
+        """
+        Window overflow: the candidate enters main only if it beats main's victim.
+        """
+        if len(self.probation) + len(self.protected) < self.main_capacity:
+            self.probation[candidate_key] = candidate_value
+            return
+
+        if not self.main_capacity:
+            return
+
+        victims = self.probation if self.probation else self.protected
+        victim_key = next(iter(victims))
+
+        if self.sketch.estimate(candidate_key) > self.sketch.estimate(victim_key):
+            del victims[victim_key]
+            self.probation[candidate_key] = candidate_value
+        # else: the candidate is dropped, the (more frequent) victim stays
+
+    def __len__(self):
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    @staticmethod
+    def run_tests():
+        print("=== TINY-LFU CACHE TESTS ===")
+
+        lru = TinyLFUCache(100)
+        for _ in range(3):
+            for key in range(50):  # hot set, seen repeatedly
+                if lru.get(key) == -1:
+                    lru.put(key, key)
+
+        for key in range(1_000, 11_000):  # one-off scan of 100x capacity
+            if lru.get(key) == -1:
+                lru.put(key, key)
+
+        print(sum(lru.get(key) != -1 for key in range(50)))  # 49 - hot set survived (plain LRU: 0)
+        print(len(lru) <= 100)  # True
+
+
+class _LockedLRUCache(CompactLRUCache):
+    """
+    Benchmark baseline: one lock around the whole cache.
+    """
+
+    __slots__ = ("lock",)
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.lock = threading.Lock()
+
+    def get(self, key: int) -> int:
+        with self.lock:
+            return super().get(key)
+
+    def put(self, key: int, value: int):
+        with self.lock:
+            super().put(key, value)
+
+
+def benchmark_concurrent_reads(thread_counts=(1, 4, 16), ops_per_thread: int = 100_000, num_keys: int = 10_000):
+    """
+    Read-heavy (95% hits) ops/sec from N threads: one global lock vs segments + read buffers.
+    """
+    print("=== CONCURRENT READS: ops/sec ===")
+    print("threads | global lock | segmented")
+
+    for threads in thread_counts:
+        rates = []
+
+        for cache_cls in (_LockedLRUCache, ConcurrentLRUCache):
+            cache = cache_cls(num_keys)
+            for key in range(num_keys):
+                cache.put(key, key)
+
+            def worker(index):
+                for i in range(ops_per_thread):
+                    key = (index * 7919 + i) % num_keys
+                    if i % 20 == 0:
+                        cache.put(key, i)
+                    else:
+                        cache.get(key)
+
+            workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+            start = time.perf_counter()
+            for worker_thread in workers:
+                worker_thread.start()
+            for worker_thread in workers:
+                worker_thread.join()
+            rates.append(threads * ops_per_thread / (time.perf_counter() - start))
+
+        print(f"{threads:7d} | {rates[0]:11,.0f} | {rates[1]:9,.0f}")
+
+
+def benchmark_lru(num_entries: int = 10 ** 6):
+    """
+    Memory per entry and get/put ops/sec, Node-based vs OrderedDict-backed,
+    with the cache holding num_entries entries.
+    """
+    print(f"=== LRU: {num_entries:,} entries ===")
+    print("implementation   |  B/entry | put ops/sec | get ops/sec")
+
+    for cache_cls in (LRUCache, CompactLRUCache):
+        # Memory: cache structures only (keys/values are shared ints)
+        keys = list(range(num_entries))
+        tracemalloc.start()
+        cache = cache_cls(num_entries)
+        for key in keys:
+            cache.put(key, key)
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del cache
+
+        # Throughput: fill (puts) then a full pass of hits, then puts that evict
+        cache = cache_cls(num_entries)
+        start = time.perf_counter()
+        for key in keys:
+            cache.put(key, key)
+        for key in keys:
+            cache.put(key + num_entries, key)
+        put_rate = 2 * num_entries / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key + num_entries)
+        get_rate = num_entries / (time.perf_counter() - start)
+
+        print(f"{cache_cls.__name__:16s} | {used / num_entries:8.0f} | {put_rate:11,.0f} | {get_rate:11,.0f}")
+
+
+def load_trace(path: str) -> list:
+    """
+    A recorded key trace: one key per line (blank lines skipped).
+    """
+    with open(path) as trace:
+        return [line.strip() for line in trace if line.strip()]
+
+
+def replay_trace(cache, keys) -> float:
+    """
+    Cache-aside replay (get, put on miss); returns the hit ratio.
+    """
+    hits = 0
+    for key in keys:
+        if cache.get(key) == -1:
+            cache.put(key, key)
+        else:
+            hits += 1
+    return hits / len(keys) if keys else 0.0
+
+
+def _zipf_trace(rng, num_accesses, num_keys, skew=1.0, prefix="k"):
+    weights = [1 / rank ** skew for rank in range(1, num_keys + 1)]
+    return [f"{prefix}{rank}" for rank in rng.choices(range(num_keys), weights, k=num_accesses)]
+
+
+def benchmark_hit_ratio(trace_paths=None, capacity: int = 1_000):
+    """
+    Hit ratio of LRU vs W-TinyLFU on recorded traces, or on synthetic ones:
+    zipf traffic alone, and zipf with nightly-batch-style scans in between.
+    """
+    if trace_paths:
+        traces = {path: load_trace(path) for path in trace_paths}
+    else:
+        rng = random.Random(42)
+        scan_traffic = []
+        for night in range(3):
+            scan_traffic += _zipf_trace(rng, 100_000, 50_000)
+            scan_traffic += [f"scan{night}-{i}" for i in range(20 * capacity)]
+        traces = {
+            "zipf": _zipf_trace(rng, 300_000, 50_000),
+            "zipf + scans": scan_traffic,
+        }
+
+    print(f"=== HIT RATIO (capacity {capacity:,}) ===")
+    print("trace                |    LRU | W-TinyLFU")
+
+    for name, keys in traces.items():
+        lru_ratio = replay_trace(CompactLRUCache(capacity), keys)
+        tiny_lfu_ratio = replay_trace(TinyLFUCache(capacity), keys)
+        print(f"{name[-20:]:20s} | {lru_ratio:6.1%} | {tiny_lfu_ratio:9.1%}")
+
+
+if __name__ == "__main__":
+    LRUCache.run_tests()
+    CompactLRUCache.run_tests()
+    ConcurrentLRUCache.run_tests()
+    TinyLFUCache.run_tests()
 
-LRUCache.run_tests()
+    # python -m problems.acheivers.LRUCache [trace.txt ...]
+    benchmark_hit_ratio(sys.argv[1:])
+    benchmark_lru()
+    benchmark_concurrent_reads()
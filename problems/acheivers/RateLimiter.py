@@ -20,12 +20,63 @@ So you need:
 ⏱ Complexity
     Per request: O(1) amortized
     Space: O(N) where N = requests in window
+
+📦 Sliding window COUNTER (algorithm="sliding_counter")
+    The timestamp log costs O(max_requests) memory per key:
+    10k req/min across 1M API keys is billions of floats.
+
+    Instead keep, per key, fixed-window counters:
+        [window_start, prev_count, curr_count]
+    and estimate the sliding count by weighting the previous window by how
+    much of it still overlaps the sliding window:
+        estimate = prev_count * (1 - elapsed / window) + curr_count
+
+    Error bounds:
+    - Exact when requests in the previous window were spread uniformly
+    - Never admits more than max_requests within one fixed window
+      (estimate >= curr_count)
+    - Worst case (previous window's requests all at its very end) an exact
+      sliding window can see up to 2 * max_requests admitted
+    - In practice (Cloudflare measured ~0.003% wrong decisions) it's
+      indistinguishable from the log for smooth traffic
+
+    Space: O(1) per key (3 numbers) instead of O(max_requests)
+
+🪣 Token bucket (algorithm="token_bucket")
+    Bucket holds up to `burst` tokens, refilled at max_requests / window
+    per second. A request takes one token. State: [tokens, last_refill].
+
+📐 GCRA (algorithm="gcra") - generic cell rate algorithm
+    Same behaviour as a token bucket with a single number of state:
+    the theoretical arrival time (TAT) of the next request.
+        emission_interval T = window / max_requests
+        new_tat  = max(tat, now) + T
+        allow_at = new_tat - T * burst
+        allowed  iff now >= allow_at   (else retry after allow_at - now)
+
+    Both: O(1) time and O(1) state per key, configurable burst, and an exact
+    retry-after - no per-request deque.append / popleft.
+
+🧱 Composite rules (CompositeRateLimiter)
+    "100/s AND 5000/min per user AND 50k/min per tenant" in one decision:
+        rules = [("user:{user}", 100, 1), ("user:{user}", 5000, 60),
+                 ("tenant:{tenant}", 50_000, 60)]
+    1. Format every rule's key template with the request's fields
+    2. Take the per-key locks in rule order (same order for every caller,
+       so two requests can never deadlock)
+    3. Decide every rule; if any rejects, refund the rules that passed
+    4. Release - nobody saw the intermediate state, so it's all-or-nothing
+
+    Returns which rule rejected and the longest retry-after among rejections.
 """
 
 
+import math
 import time
+import tracemalloc
 from collections import deque
-from threading import Lock
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
 
 
 class RateLimiter:
@@ -37,16 +88,37 @@ class RateLimiter:
     2. A correct thread-safe implementation using per-key locks
     """
 
-    def __init__(self, max_requests: int, window_seconds: int):
+    ALGORITHMS = ("sliding_log", "sliding_counter", "token_bucket", "gcra")
+
+    def __init__(self, max_requests: int, window_seconds: int, algorithm: str = "sliding_log",
+                 burst: int = None, sweep_batch: int = 2):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {self.ALGORITHMS}")
+
         self.max_requests = max_requests
         self.window_seconds = window_seconds
+        self.algorithm = algorithm
+
+        # token_bucket / gcra: steady rate + how many requests may arrive at once
+        self.rate = max_requests / window_seconds
+        self.burst = burst if burst is not None else max_requests
+
+        # Per-algorithm decision: (state, now) -> (allowed, retry_after)
+        self._decide = getattr(self, f"_decide_{algorithm}")
+
+        # Per-algorithm undo of an allowed decision (CompositeRateLimiter rollback)
+        self._refund = getattr(self, f"_refund_{algorithm}")
 
         # --------------------------------------------------------
         # DATA STRUCTURES (IMPORTANT TO VISUALIZE)
         # --------------------------------------------------------
 
-        # key -> deque of timestamps
-        # Example:
+        # key -> per-key state
+        # sliding_log:     deque of timestamps
+        # sliding_counter: [window_start, prev_count, curr_count]
+        # token_bucket:    [tokens, last_refill]
+        # gcra:            [theoretical_arrival_time]
+        # Example (sliding_log):
         # {
         #   "user1": deque([1000.0, 1001.2, 1002.5]),
         #   "user2": deque([1003.1])
@@ -61,9 +133,27 @@ class RateLimiter:
         # }
         self.locks = {}
 
-        # Protects creation of per-key deque + lock
+        # Protects creation (and idle eviction) of per-key state + lock
         self.global_lock = Lock()
 
+        # --------------------------------------------------------
+        # IDLE-KEY EVICTION
+        # --------------------------------------------------------
+        # Keys in creation order, rotated by the incremental sweeper.
+        # A key whose state is "idle" (indistinguishable from a fresh one)
+        # is dropped from requests + locks, so per-IP limiting doesn't grow forever.
+        self._sweep_queue = deque()
+
+        # Keys examined per NEW key (0 = only sweep()/background thread).
+        # Sweeping is paid for by key creation, which already takes
+        # global_lock; calls for known keys never touch it. Examining more
+        # keys than are created keeps the tracked set bounded.
+        self.sweep_batch = sweep_batch
+        self._pending_sweep = 0
+        self.evicted_keys = 0
+        self._sweeper = None
+        self._stop_sweeper = Event()
+
     # ============================================================
     # 1️⃣ NAIVE VERSION (NOT THREAD SAFE)
     # ============================================================
@@ -98,22 +188,213 @@ class RateLimiter:
     # ============================================================
     # 2️⃣ THREAD-SAFE VERSION (PER-KEY LOCKING)
     # ============================================================
+    def _new_state(self):
+        if self.algorithm == "sliding_counter":
+            # [window_start, prev_count, curr_count]; rolled forward on first use
+            return [0.0, 0, 0]
+        if self.algorithm == "token_bucket":
+            # [tokens, last_refill]; starts full
+            return [float(self.burst), None]
+        if self.algorithm == "gcra":
+            # [theoretical_arrival_time]
+            return [0.0]
+        return deque()
+
     def _get_key_structs(self, key):
         """
-        Lazily initializes per-key deque and lock.
+        Lazily initializes per-key state and lock.
+
+        Fast path (key already exists - almost every call):
+        - two dict reads, NO global lock, so threads working on different
+          keys never serialize on one lock
 
-        This must be protected by a global lock to avoid:
-        - Two threads creating two different deques for same key
+        Slow path (first request for a key):
+        - double-checked under the global lock to avoid two threads
+          creating two different states for the same key
+        - the lock is published BEFORE the state, so a reader that sees
+          the state always finds its lock
         """
 
+        state = self.requests.get(key)
+        if state is not None:
+            lock = self.locks.get(key)
+            if lock is not None:
+                return state, lock
+
         with self.global_lock:
             if key not in self.requests:
-                self.requests[key] = deque()
                 self.locks[key] = Lock()
+                self.requests[key] = self._new_state()
+                self._sweep_queue.append(key)
+                self._pending_sweep += self.sweep_batch
 
             return self.requests[key], self.locks[key]
 
-    def allow_request(self, key: str, current_time: float = None) -> bool:
+    # ------------------------------------------------------------
+    # Per-algorithm decisions: (state, now, cost) -> (allowed, retry_after)
+    # Caller holds the per-key lock. retry_after is inf when cost can never
+    # fit (cost > max_requests / burst).
+    # ------------------------------------------------------------
+    def _decide_sliding_log(self, timestamps, current_time, cost=1):
+        # Cleanup old timestamps
+        while timestamps and current_time - timestamps[0] > self.window_seconds:
+            timestamps.popleft()
+
+        if len(timestamps) + cost <= self.max_requests:
+            timestamps.extend([current_time] * cost)
+            return True, 0.0
+        elif cost > self.max_requests:
+            return False, math.inf
+        else:
+            # Wait until enough of the oldest timestamps leave the window
+            must_leave = timestamps[len(timestamps) + cost - self.max_requests - 1]
+            return False, must_leave + self.window_seconds - current_time
+
+    def _roll_window(self, counters, current_time):
+        """
+        Move [window_start, prev, curr] forward to the fixed window holding current_time.
+        """
+        window_start, prev_count, curr_count = counters
+        windows_passed = int((current_time - window_start) // self.window_seconds)
+
+        if windows_passed >= 1:
+            # Exactly one window passed: current becomes previous; more: both idle
+            counters[1] = curr_count if windows_passed == 1 else 0
+            counters[2] = 0
+            counters[0] = window_start + windows_passed * self.window_seconds
+
+    def _estimate(self, counters, current_time):
+        window_start, prev_count, curr_count = counters
+        overlap = 1.0 - (current_time - window_start) / self.window_seconds
+        return prev_count * overlap + curr_count
+
+    def _counter_retry_after(self, counters, current_time, cost=1):
+        """
+        Time until prev_count's shrinking weight makes room for `cost` requests.
+        """
+        window_start, prev_count, curr_count = counters
+        window = self.window_seconds
+        elapsed = current_time - window_start
+
+        # Room within this window: prev * (1 - (elapsed + t) / w) <= room
+        room = self.max_requests - curr_count - cost
+        if room >= 0 and prev_count > 0:
+            return max(0.0, window * (1 - room / prev_count) - elapsed)
+
+        # Otherwise wait for the next window, where curr becomes prev
+        until_next = window - elapsed
+        room = self.max_requests - cost
+        if curr_count <= room:
+            return until_next
+        return until_next + window * (1 - room / curr_count)
+
+    def _decide_sliding_counter(self, counters, current_time, cost=1):
+        self._roll_window(counters, current_time)
+
+        if self._estimate(counters, current_time) + cost <= self.max_requests:
+            counters[2] += cost
+            return True, 0.0
+        elif cost > self.max_requests:
+            return False, math.inf
+        else:
+            return False, self._counter_retry_after(counters, current_time, cost)
+
+    def _decide_token_bucket(self, bucket, current_time, cost=1):
+        tokens, last_refill = bucket
+
+        # Refill lazily: rate tokens/sec since the last decision, capped at burst
+        if last_refill is not None:
+            elapsed = max(0.0, current_time - last_refill)
+            tokens = min(float(self.burst), tokens + elapsed * self.rate)
+        bucket[1] = current_time
+
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True, 0.0
+        else:
+            bucket[0] = tokens
+            if cost > self.burst:
+                return False, math.inf
+            return False, (cost - tokens) / self.rate
+
+    def _decide_gcra(self, cell, current_time, cost=1):
+        # One request "costs" one emission interval of theoretical time;
+        # up to `burst` intervals may be borrowed ahead of now
+        emission_interval = 1 / self.rate
+        new_tat = max(cell[0], current_time) + emission_interval * cost
+        allow_at = new_tat - emission_interval * self.burst
+
+        # Tolerance: T * burst rarely sums back exactly in floating point
+        if allow_at - current_time > 1e-9:
+            return False, math.inf if cost > self.burst else allow_at - current_time
+
+        cell[0] = new_tat
+        return True, 0.0
+
+    # ------------------------------------------------------------
+    # Refunds: undo an ALLOWED decision of `cost` made at the same
+    # current_time. Caller still holds the per-key lock it decided under.
+    # ------------------------------------------------------------
+    def _refund_sliding_log(self, timestamps, current_time, cost=1):
+        for _ in range(cost):
+            timestamps.pop()
+
+    def _refund_sliding_counter(self, counters, current_time, cost=1):
+        counters[2] -= cost
+
+    def _refund_token_bucket(self, bucket, current_time, cost=1):
+        bucket[0] += cost
+
+    def _refund_gcra(self, cell, current_time, cost=1):
+        # An idle cell comes back as tat == now, which behaves like the old one
+        cell[0] -= cost / self.rate
+
+    def _locked_state(self, key):
+        """
+        Per-key state with its lock HELD; caller must release the lock.
+
+        The sweeper may evict a state between lookup and lock; deciding on
+        that orphan would lose the update, so look it up again.
+        """
+        while True:
+            state, lock = self._get_key_structs(key)
+            lock.acquire()
+            if self.requests.get(key) is state:
+                return state, lock
+            lock.release()
+
+    @staticmethod
+    def _check_cost(cost):
+        """
+        cost=0 would always pass, and a negative cost would hand units back
+        (lower curr_count / add tokens) - a caller could raise its own limit.
+        """
+        if cost < 1:
+            raise ValueError(f"cost must be >= 1, got {cost!r}")
+
+    def try_acquire(self, key: str, current_time: float = None, cost: int = 1) -> Tuple[bool, float]:
+        """
+        ✅ Thread-safe decision plus retry-after.
+
+        cost: units this request consumes (e.g. a heavy endpoint = 5), >= 1.
+        Returns (allowed, retry_after_seconds); retry_after is 0.0 when allowed.
+        """
+
+        self._check_cost(cost)
+
+        if current_time is None:
+            current_time = time.time()
+
+        self._maybe_sweep(current_time)
+
+        # Per-key critical section
+        state, lock = self._locked_state(key)
+        try:
+            return self._decide(state, current_time, cost)
+        finally:
+            lock.release()
+
+    def allow_request(self, key: str, current_time: float = None, cost: int = 1) -> bool:
         """
         ✅ Thread-safe version.
 
@@ -124,23 +405,206 @@ class RateLimiter:
 
         all happen atomically.
         """
+        return self.try_acquire(key, current_time, cost)[0]
+
+    def allow_many(self, requests: List[Tuple[str, int]], current_time: float = None) -> List[bool]:
+        """
+        ✅ Batch admission: [(key, cost), ...] -> [allowed, ...] in input order.
+
+        Requests are grouped per key so each per-key lock is taken once per
+        batch; within a key they're decided in input order. One sweep and one
+        clock read for the whole batch.
+        """
 
         if current_time is None:
             current_time = time.time()
 
-        timestamps, lock = self._get_key_structs(key)
+        self._maybe_sweep(current_time)
 
-        # Per-key critical section
-        with lock:
-            # Cleanup old timestamps
-            while timestamps and current_time - timestamps[0] > self.window_seconds:
-                timestamps.popleft()
+        # key -> [(position, cost), ...]; validated before anything is decided
+        by_key = {}
+        for position, (key, cost) in enumerate(requests):
+            self._check_cost(cost)
+            by_key.setdefault(key, []).append((position, cost))
+
+        results = [False] * len(requests)
+        for key, batch in by_key.items():
+            state, lock = self._locked_state(key)
+            try:
+                for position, cost in batch:
+                    results[position] = self._decide(state, current_time, cost)[0]
+            finally:
+                lock.release()
+
+        return results
+
+    # ============================================================
+    # 3️⃣ IDLE-KEY EVICTION
+    # ============================================================
+    def _is_idle(self, state, current_time) -> bool:
+        """
+        True when the state would behave exactly like a freshly created one.
+        """
+        if self.algorithm == "sliding_counter":
+            # Both the current and the previous fixed window are over
+            return current_time - state[0] >= 2 * self.window_seconds
+        if self.algorithm == "token_bucket":
+            tokens, last_refill = state
+            return last_refill is None or tokens + (current_time - last_refill) * self.rate >= self.burst
+        if self.algorithm == "gcra":
+            return state[0] <= current_time
+        # sliding_log: newest timestamp already left the window
+        return not state or current_time - state[-1] > self.window_seconds
+
+    # Max keys examined per global_lock hold
+    SWEEP_CHUNK = 1024
+
+    def _maybe_sweep(self, current_time):
+        """
+        Inline incremental sweep owed by recently created keys, if any.
+
+        Fast path is one attribute read; the unlocked read-and-reset may
+        lose a few keys' worth of budget under races, which is harmless.
+        """
+        pending = self._pending_sweep
+        if pending:
+            self._pending_sweep = 0
+            self.sweep(pending, current_time, blocking=False)
+
+    def sweep(self, max_keys: int = None, current_time: float = None, blocking: bool = True) -> int:
+        """
+        Examine up to max_keys keys (default: all) in rotation and evict idle ones.
+
+        blocking=False (used inline from allow_request) gives up instead of
+        waiting on the global lock or on a key that's currently in use, so
+        the hot path never queues behind the sweeper.
+        global_lock is held for at most SWEEP_CHUNK keys at a time.
+        Returns the number of evicted keys.
+        """
+        if current_time is None:
+            current_time = time.time()
+
+        remaining = len(self._sweep_queue) if max_keys is None else max_keys
+        evicted = 0
+
+        # Bounded chunks: key creation can take global_lock between them,
+        # so a full pass over 1M keys doesn't stall every new key
+        while remaining > 0:
+            if not self.global_lock.acquire(blocking=blocking):
+                break
+
+            try:
+                chunk = min(remaining, self.SWEEP_CHUNK, len(self._sweep_queue))
+                if chunk == 0:
+                    break
+                remaining -= chunk
+
+                for _ in range(chunk):
+                    key = self._sweep_queue.popleft()
+                    lock = self.locks[key]
+
+                    # Key in use right now => certainly not idle
+                    if not lock.acquire(blocking=False):
+                        self._sweep_queue.append(key)
+                        continue
+
+                    try:
+                        if self._is_idle(self.requests[key], current_time):
+                            del self.requests[key]
+                            del self.locks[key]
+                            self.evicted_keys += 1
+                            evicted += 1
+                        else:
+                            self._sweep_queue.append(key)
+                    finally:
+                        lock.release()
+            finally:
+                self.global_lock.release()
+
+        return evicted
+
+    def start_sweeper(self, interval_seconds: float = 1.0):
+        """
+        Background alternative to per-call sweeping: a full pass every interval.
+        """
+        def run():
+            while not self._stop_sweeper.wait(interval_seconds):
+                self.sweep()
+
+        self._sweeper = Thread(target=run, name="rate-limiter-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
 
-            if len(timestamps) < self.max_requests:
-                timestamps.append(current_time)
-                return True
-            else:
-                return False
+    def tracked_keys(self) -> int:
+        return len(self.requests)
+
+    def stats(self) -> dict:
+        return {"tracked_keys": len(self.requests), "evicted_keys": self.evicted_keys}
+
+    def current_usage(self, key: str, current_time: float = None) -> float:
+        """
+        Lock-free read of how many requests the key has used in the window.
+
+        Takes no lock: it may race with a concurrent allow_request and be
+        off by that request - fine for dashboards and X-RateLimit headers.
+        (token_bucket / gcra: capacity in use out of `burst`.)
+        """
+        if current_time is None:
+            current_time = time.time()
+
+        state = self.requests.get(key)
+        if state is None:
+            return 0
+
+        if self.algorithm == "sliding_counter":
+            window_start, prev_count, curr_count = state
+            windows_passed = int((current_time - window_start) // self.window_seconds)
+            if windows_passed >= 2:
+                return 0
+            if windows_passed == 1:
+                prev_count, curr_count = curr_count, 0
+                window_start += self.window_seconds
+            overlap = 1.0 - (current_time - window_start) / self.window_seconds
+            return prev_count * overlap + curr_count
+
+        if self.algorithm == "token_bucket":
+            tokens, last_refill = state
+            if last_refill is not None:
+                tokens = min(float(self.burst), tokens + max(0.0, current_time - last_refill) * self.rate)
+            return self.burst - tokens
+
+        if self.algorithm == "gcra":
+            return max(0.0, state[0] - current_time) * self.rate
+
+        return sum(1 for ts in list(state) if current_time - ts <= self.window_seconds)
+
+    # ============================================================
+    # BENCHMARK
+    # ============================================================
+    @staticmethod
+    def benchmark_memory(num_keys: int = 10_000, max_requests: int = 100, requests_per_key: int = 100):
+        """
+        Traced memory per tracked key, sliding log vs sliding counter.
+        """
+        print(f"=== MEMORY: {num_keys:,} keys x {requests_per_key} requests (limit {max_requests}/min) ===")
+
+        for algorithm in RateLimiter.ALGORITHMS:
+            tracemalloc.start()
+            limiter = RateLimiter(max_requests=max_requests, window_seconds=60, algorithm=algorithm)
+
+            base_time = 1000.0
+            for i in range(requests_per_key):
+                now = base_time + i * (30.0 / requests_per_key)
+                for k in range(num_keys):
+                    limiter.allow_request(f"api-key-{k}", now)
+
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{algorithm:16s}: {used / 2 ** 20:8.1f} MiB total, {used / num_keys:7.0f} B/key")
 
     # ============================================================
     # TESTS
@@ -173,6 +637,205 @@ class RateLimiter:
         print(limiter.allow_request("user2", base_time))       # True
         print(limiter.allow_request("user2", base_time + 1))   # True
 
+        print("\n-- Sliding window counter --")
+        limiter = RateLimiter(max_requests=3, window_seconds=10, algorithm="sliding_counter")
+        print(limiter.allow_request("user1", base_time))       # True
+        print(limiter.allow_request("user1", base_time + 1))   # True
+        print(limiter.allow_request("user1", base_time + 2))   # True
+        print(limiter.allow_request("user1", base_time + 3))   # False
+        # Next window, 5s in: previous 3 requests weighted 0.5 -> 1.5 used
+        print(limiter.allow_request("user1", base_time + 15))  # True
+        print(limiter.current_usage("user1", base_time + 15))  # 2.5
+
+        print("\n-- Token bucket (3 per 10s, burst 3) --")
+        limiter = RateLimiter(max_requests=3, window_seconds=10, algorithm="token_bucket")
+        print([limiter.allow_request("user1", base_time) for _ in range(4)])  # [True, True, True, False]
+        print(limiter.try_acquire("user1", base_time + 1))      # (False, ~2.33) - one token per 3.33s
+        print(limiter.try_acquire("user1", base_time + 3.5))    # (True, 0.0)
+
+        print("\n-- GCRA (3 per 10s, burst 2) --")
+        limiter = RateLimiter(max_requests=3, window_seconds=10, algorithm="gcra", burst=2)
+        print([limiter.allow_request("user1", base_time) for _ in range(3)])  # [True, True, False]
+        print(limiter.try_acquire("user1", base_time + 1))      # (False, ~2.33)
+        print(limiter.try_acquire("user1", base_time + 3.34))   # (True, 0.0)
+
+        print("\n-- Cost-weighted + batch admission --")
+        limiter = RateLimiter(max_requests=10, window_seconds=10, algorithm="token_bucket")
+        print(limiter.try_acquire("user1", base_time, cost=8))  # (True, 0.0)
+        print(limiter.try_acquire("user1", base_time, cost=5))  # (False, 3.0) - needs 3 more tokens
+        print(limiter.allow_many([("user2", 4), ("user3", 1), ("user2", 4), ("user2", 4)], base_time))
+        # [True, True, True, False]
+        try:
+            limiter.try_acquire("user1", base_time, cost=-5)
+        except ValueError as error:
+            print(error)                                         # cost must be >= 1, got -5
+
+        print("\n-- Idle-key eviction --")
+        limiter = RateLimiter(max_requests=3, window_seconds=10)
+        for ip in range(100):
+            limiter.allow_request(f"10.0.0.{ip}", base_time)
+        print(limiter.tracked_keys())                           # 100
+        limiter.allow_request("10.0.0.1", base_time + 20)       # evicts 2 idle keys inline
+        print(limiter.sweep(current_time=base_time + 20))       # 97 (every other idle key)
+        print(limiter.stats())                                  # {'tracked_keys': 1, 'evicted_keys': 99}
+
+
+class _GlobalLockRateLimiter(RateLimiter):
+    """
+    Benchmark baseline: every call takes global_lock, even for known keys.
+    """
+
+    def _get_key_structs(self, key):
+        with self.global_lock:
+            if key not in self.requests:
+                self.requests[key] = self._new_state()
+                self.locks[key] = Lock()
+                self._sweep_queue.append(key)
+                self._pending_sweep += self.sweep_batch
+
+            return self.requests[key], self.locks[key]
+
 
-# Run tests
-RateLimiter.run_tests()
+def benchmark_contention(thread_counts=(1, 4, 16, 64), ops_per_thread: int = 20_000, num_keys: int = 1_000):
+    """
+    Decisions/sec (and allowed/sec) from N threads hammering shared keys,
+    global-lock lookup vs lock-free fast path.
+    """
+    print("=== CONTENTION: decisions/sec ===")
+    print("threads | global lock | fast path | allowed/sec (fast path)")
+
+    for threads in thread_counts:
+        rates = []
+        allowed_rate = 0.0
+
+        for limiter_cls in (_GlobalLockRateLimiter, RateLimiter):
+            # sliding_counter keys stay non-idle for the whole run, so this measures
+            # lookups (+ the default inline sweeps), not evict/re-create churn
+            limiter = limiter_cls(max_requests=1_000_000, window_seconds=60, algorithm="sliding_counter")
+            keys = [f"api-key-{k}" for k in range(num_keys)]
+            allowed = [0] * threads
+
+            def worker(index):
+                count = 0
+                for i in range(ops_per_thread):
+                    count += limiter.allow_request(keys[(index * 7919 + i) % num_keys])
+                allowed[index] = count
+
+            workers = [Thread(target=worker, args=(index,)) for index in range(threads)]
+            start = time.perf_counter()
+            for worker_thread in workers:
+                worker_thread.start()
+            for worker_thread in workers:
+                worker_thread.join()
+            elapsed = time.perf_counter() - start
+
+            rates.append(threads * ops_per_thread / elapsed)
+            allowed_rate = sum(allowed) / elapsed
+
+        print(f"{threads:7d} | {rates[0]:11,.0f} | {rates[1]:9,.0f} | {allowed_rate:,.0f}")
+
+
+class CompositeRateLimiter:
+    """
+    Several (key_template, max_requests, window_seconds) rules, all of which
+    must admit a request; decided in one pass and committed atomically.
+    """
+
+    def __init__(self, rules: List[Tuple[str, int, float]], algorithm: str = "gcra", sweep_batch: int = 2):
+        self.rules = [tuple(rule) for rule in rules]
+
+        # One limiter per rule: a rule's keys, state and locks live in its own
+        # limiter, so "user:{user}" at 100/s and at 5000/min don't collide
+        self.limiters = [
+            RateLimiter(max_requests, window_seconds, algorithm=algorithm, sweep_batch=sweep_batch)
+            for _, max_requests, window_seconds in self.rules
+        ]
+
+    def keys_for(self, fields: Dict[str, str]) -> List[str]:
+        """
+        Resolve every rule's key template, e.g. {"user": "u1"} -> "user:u1".
+        """
+        return [template.format(**fields) for template, _, _ in self.rules]
+
+    def try_acquire(self, fields: Dict[str, str], current_time: float = None,
+                    cost: int = 1) -> Tuple[bool, float, Optional[Tuple[str, int, float]]]:
+        """
+        ✅ All-or-nothing decision across every rule.
+
+        Returns (allowed, retry_after, rejected_rule): rejected_rule is the
+        first rule (in rule order) that said no, None when allowed.
+        """
+
+        RateLimiter._check_cost(cost)
+
+        if current_time is None:
+            current_time = time.time()
+
+        keys = self.keys_for(fields)
+
+        for limiter in self.limiters:
+            limiter._maybe_sweep(current_time)
+
+        # Locks in rule order; each rule has its own limiter, so the order is global
+        held = []
+        try:
+            for limiter, key in zip(self.limiters, keys):
+                held.append((limiter, *limiter._locked_state(key)))
+
+            rejected_rule, retry_after = None, 0.0
+            passed = []
+
+            for rule, (limiter, state, _) in zip(self.rules, held):
+                allowed, wait = limiter._decide(state, current_time, cost)
+                if allowed:
+                    passed.append((limiter, state))
+                else:
+                    # Keep going: the caller must wait for the slowest rule
+                    retry_after = max(retry_after, wait)
+                    if rejected_rule is None:
+                        rejected_rule = rule
+
+            if rejected_rule is None:
+                return True, 0.0, None
+
+            # Roll back before anyone else can observe the partial commit
+            for limiter, state in passed:
+                limiter._refund(state, current_time, cost)
+            return False, retry_after, rejected_rule
+        finally:
+            for _, _, lock in reversed(held):
+                lock.release()
+
+    def allow_request(self, fields: Dict[str, str], current_time: float = None, cost: int = 1) -> bool:
+        return self.try_acquire(fields, current_time, cost)[0]
+
+    @staticmethod
+    def run_tests():
+        print("\n=== COMPOSITE RATE LIMITER TESTS ===")
+
+        base_time = 1000.0
+        limiter = CompositeRateLimiter([
+            ("user:{user}", 2, 1),          # 2/s per user
+            ("user:{user}", 3, 60),         # 3/min per user
+            ("tenant:{tenant}", 4, 60),     # 4/min per tenant
+        ])
+        alice = {"user": "alice", "tenant": "acme"}
+        bob = {"user": "bob", "tenant": "acme"}
+
+        print(limiter.try_acquire(alice, base_time))        # (True, 0.0, None)
+        print(limiter.try_acquire(alice, base_time))        # (True, 0.0, None)
+        print(limiter.try_acquire(alice, base_time)[2])     # ('user:{user}', 2, 1) - per-second rule
+        print(limiter.try_acquire(alice, base_time + 1))    # (True, 0.0, None)
+        print(limiter.try_acquire(alice, base_time + 2)[2])  # ('user:{user}', 3, 60) - per-minute rule
+
+        # Alice's rejected attempts were rolled back: acme has used 3 of 4
+        print(limiter.allow_request(bob, base_time + 2))    # True
+        print(limiter.try_acquire(bob, base_time + 3)[2])   # ('tenant:{tenant}', 4, 60)
+
+
+if __name__ == "__main__":
+    RateLimiter.run_tests()
+    CompositeRateLimiter.run_tests()
+
+    RateLimiter.benchmark_memory()
+    benchmark_contention()
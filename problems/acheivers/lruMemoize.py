@@ -0,0 +1,162 @@
+"""
+🗃 @lru_memoize - memoization on top of LRUCache
+
+🧠 Intuition
+
+“A pure function called twice with the same arguments returns the same
+result, so remember the result and skip the second call.”
+
+So you need:
+    A key per call          -> the argument tuple (+ argument types if typed)
+    A bounded store         -> LRUCache(capacity): cold results fall out
+    Optional staleness cap  -> per-entry expiry time (ttl)
+
+❓ Why not functools.lru_cache?
+    It has no TTL (results that depend on slowly changing data go stale
+    forever) and hides its cache, so nothing can hook into eviction.
+
+📦 Entries
+    LRUCache stores (result, expire_time) tuples - never -1, so a stored
+    result of -1 can't be confused with LRUCache's miss marker.
+    An expired entry counts as a miss and is overwritten by the fresh result.
+
+⏱ Complexity
+    Per call: O(len(args) + len(kwargs)) to build the key + O(1) cache ops
+    Space: O(capacity)
+
+⚠️ lock=True guards the cache, not the call: two threads missing the same
+   key at once may both compute it (like functools.lru_cache). Computing
+   outside the lock keeps recursive functions (fib) from deadlocking.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+try:
+    from problems.acheivers.LRUCache import LRUCache
+except ModuleNotFoundError:
+    # Run as a script (python path/to/this_file.py): the sibling module is on sys.path
+    from LRUCache import LRUCache
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "expired", "capacity", "currsize"])
+
+# Separates positional from keyword arguments inside a key
+_KWARGS_MARK = object()
+
+
+def _make_key(args, kwargs, typed):
+    """
+    f(1, b=2) -> (1, MARK, "b", 2); typed adds (int, int) so f(1) != f(1.0).
+    """
+    key = args
+    if kwargs:
+        key += (_KWARGS_MARK,)
+        for item in kwargs.items():
+            key += item
+
+    if typed:
+        key += tuple(type(arg) for arg in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+
+    return key
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def lru_memoize(capacity: int = 128, ttl: float = None, typed: bool = False, lock: bool = False):
+    """
+    Decorator: cache up to `capacity` results, each for at most `ttl` seconds.
+
+        @lru_memoize(capacity=1024, ttl=60)
+        def get_products(page, limit, search=None): ...
+
+        get_products.cache_info()   # CacheInfo(hits=..., misses=..., ...)
+        get_products.cache_clear()
+    """
+
+    def decorator(func):
+        cache = LRUCache(capacity)
+        guard = threading.Lock() if lock else _NoLock()
+
+        # hits, misses, expired
+        counters = [0, 0, 0]
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs, typed)
+
+            with guard:
+                entry = cache.get(key)
+
+                if entry != -1:
+                    result, expire_time = entry
+                    if expire_time is None or time.monotonic() < expire_time:
+                        counters[0] += 1
+                        return result
+                    counters[2] += 1
+
+                counters[1] += 1
+
+            result = func(*args, **kwargs)
+            expire_time = None if ttl is None else time.monotonic() + ttl
+
+            with guard:
+                cache.put(key, (result, expire_time))
+
+            return result
+
+        def cache_info() -> CacheInfo:
+            with guard:
+                return CacheInfo(counters[0], counters[1], counters[2], capacity, len(cache.cache))
+
+        def cache_clear():
+            nonlocal cache
+            with guard:
+                cache = LRUCache(capacity)
+                counters[:] = [0, 0, 0]
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    print("=== LRU MEMOIZE ===")
+
+    @lru_memoize(capacity=100)
+    def fib(n):
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+    print(fib(80))           # 23416728348467685
+    print(fib.cache_info())  # hits=78, misses=81 - each n computed once
+
+    @lru_memoize(capacity=2, typed=True)
+    def describe(value):
+        return f"{type(value).__name__}:{value}"
+
+    print(describe(1), describe(1.0))  # int:1 float:1.0 - typed keys
+    print(describe.cache_info().currsize)  # 2
+
+    calls = []
+
+    @lru_memoize(capacity=10, ttl=0.05, lock=True)
+    def exchange_rate(currency):
+        calls.append(currency)
+        return {"EUR": 1.08}[currency]
+
+    exchange_rate("EUR")
+    exchange_rate("EUR")
+    time.sleep(0.06)
+    exchange_rate("EUR")  # expired -> recomputed
+    print(len(calls), exchange_rate.cache_info())  # 2 CacheInfo(hits=1, misses=2, expired=1, ...)
@@ -0,0 +1,199 @@
+"""
+🧮 Multi-Process Shared-Memory Rate Limiter
+
+🧠 Intuition
+
+“With 16 gunicorn workers, 16 in-process RateLimiters each allow the full
+limit, so the real limit is 16x the configured one.”
+
+So all workers on one host must share the per-key state:
+    - State lives in multiprocessing.shared_memory (one mmap'd block)
+    - Fixed-size slots, so no process ever needs to allocate in it
+    - Per-bucket locks (multiprocessing.Lock) make read-decide-write atomic
+
+❓ Which algorithm?
+    GCRA - one float per key (theoretical arrival time), so a slot is just
+    [fingerprint: u64][tat: f64] = 16 bytes. Same semantics as
+    RateLimiter(algorithm="gcra"): rate = max_requests / window, burst.
+
+📦 Layout (open-addressed hash table, bucketed)
+    num_buckets buckets x bucket_size slots x 16 bytes
+    key -> 64-bit blake2b fingerprint (stable across processes, unlike hash())
+        -> bucket = fingerprint % num_buckets
+    Probing never leaves the bucket, so ONE stripe lock covers it:
+        lock = locks[bucket % num_locks]
+
+    Full bucket? Reuse an idle slot (tat <= now => state equals a fresh key);
+    otherwise evict the slot with the oldest tat (least recently limited).
+    Eviction can only make the limiter more lenient, never stricter.
+
+⏱ Complexity
+    Per request: O(bucket_size) under one lock, no network hop
+    Space: 16 bytes * num_buckets * bucket_size, fixed up front
+
+⚠️ Create it in the parent before forking (gunicorn --preload), or pass it
+   to multiprocessing.Process: the locks travel with the object on spawn.
+   For spawn/forkserver workers pass mp_context=get_context(method) so the
+   locks are created in the matching start-method context.
+"""
+
+import hashlib
+import math
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Tuple
+
+_SLOT = struct.Struct("<Qd")  # fingerprint, theoretical arrival time
+
+
+class SharedMemoryRateLimiter:
+    def __init__(self, max_requests: int, window_seconds: float, burst: int = None,
+                 num_buckets: int = 4096, bucket_size: int = 8, num_locks: int = 64,
+                 mp_context=None):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.burst = burst if burst is not None else max_requests
+        self.emission_interval = window_seconds / max_requests
+
+        self.num_buckets = num_buckets
+        self.bucket_size = bucket_size
+
+        # Zero-filled block: fingerprint 0 == empty slot
+        self._shm = shared_memory.SharedMemory(create=True, size=num_buckets * bucket_size * _SLOT.size)
+        self._owner = True
+
+        # Lock striping: bucket b is guarded by locks[b % num_locks]
+        # (locks must come from the same start-method context as the workers)
+        context = mp_context if mp_context is not None else multiprocessing
+        self._locks = [context.Lock() for _ in range(num_locks)]
+
+    # ------------------------------------------------------------
+    # Sharing with child processes (spawn / Process args)
+    # ------------------------------------------------------------
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = self._shm.name
+        state["_owner"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Children started by fork/spawn share the parent's resource tracker,
+        # so attaching doesn't add a second owner; only the creator unlinks
+        self._shm = shared_memory.SharedMemory(name=state["_shm"])
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Free the block (owner only, after all workers are done).
+        """
+        if self._owner:
+            self._shm.unlink()
+
+    # ------------------------------------------------------------
+    # Hash table
+    # ------------------------------------------------------------
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return fingerprint or 1  # 0 is reserved for "empty"
+
+    def _find_slot(self, fingerprint: int, bucket: int, current_time: float) -> Tuple[int, float]:
+        """
+        Offset of the key's slot (claimed if new) and its tat. Caller holds the bucket lock.
+        """
+        buf = self._shm.buf
+        first = bucket * self.bucket_size * _SLOT.size
+
+        free_offset = None
+        oldest_offset, oldest_tat = None, math.inf
+
+        for i in range(self.bucket_size):
+            offset = first + i * _SLOT.size
+            slot_fingerprint, tat = _SLOT.unpack_from(buf, offset)
+
+            if slot_fingerprint == fingerprint:
+                return offset, tat
+
+            if free_offset is None and (slot_fingerprint == 0 or tat <= current_time):
+                free_offset = offset  # empty, or idle => indistinguishable from fresh
+            if tat < oldest_tat:
+                oldest_offset, oldest_tat = offset, tat
+
+        offset = free_offset if free_offset is not None else oldest_offset
+        _SLOT.pack_into(buf, offset, fingerprint, 0.0)
+        return offset, 0.0
+
+    # ------------------------------------------------------------
+    # Public API (same shape as RateLimiter)
+    # ------------------------------------------------------------
+    def try_acquire(self, key: str, current_time: float = None, cost: int = 1) -> Tuple[bool, float]:
+        # cost <= 0 would pass for free, and a negative cost would pull the tat
+        # back and hand quota to the caller (see RateLimiter._check_cost)
+        if cost < 1:
+            raise ValueError(f"cost must be >= 1, got {cost!r}")
+
+        if current_time is None:
+            current_time = time.time()
+
+        fingerprint = self._fingerprint(key)
+        bucket = fingerprint % self.num_buckets
+
+        with self._locks[bucket % len(self._locks)]:
+            offset, tat = self._find_slot(fingerprint, bucket, current_time)
+
+            # GCRA (see RateLimiter._decide_gcra)
+            new_tat = max(tat, current_time) + self.emission_interval * cost
+            allow_at = new_tat - self.emission_interval * self.burst
+
+            if allow_at - current_time > 1e-9:
+                return False, math.inf if cost > self.burst else allow_at - current_time
+
+            _SLOT.pack_into(self._shm.buf, offset, fingerprint, new_tat)
+            return True, 0.0
+
+    def allow_request(self, key: str, current_time: float = None, cost: int = 1) -> bool:
+        return self.try_acquire(key, current_time, cost)[0]
+
+    def tracked_keys(self, current_time: float = None) -> int:
+        """
+        Occupied, non-idle slots (a full scan - for stats, not the hot path).
+        """
+        if current_time is None:
+            current_time = time.time()
+
+        return sum(
+            1 for fingerprint, tat in _SLOT.iter_unpack(self._shm.buf)
+            if fingerprint and tat > current_time
+        )
+
+
+def _worker(limiter: SharedMemoryRateLimiter, attempts: int, results) -> None:
+    allowed = sum(limiter.allow_request("tenant-42") for _ in range(attempts))
+    results.put(allowed)
+    limiter.close()
+
+
+if __name__ == "__main__":
+    print("=== SHARED-MEMORY RATE LIMITER ===")
+
+    # 50 requests per minute, shared by 4 worker processes
+    limiter = SharedMemoryRateLimiter(max_requests=50, window_seconds=60)
+    results = multiprocessing.Queue()
+
+    workers = [multiprocessing.Process(target=_worker, args=(limiter, 100, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    per_worker = [results.get() for _ in workers]
+    print("allowed per worker:", per_worker)
+    print("total allowed:", sum(per_worker))  # 50, not 4 x 50
+
+    limiter.close()
+    limiter.unlink()
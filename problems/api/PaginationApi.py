@@ -15,33 +15,219 @@ Returns:
     "total_pages": ...,
     "has_next": True/False
 }
+
+Sorted indexes:
+- Sorting on every request is O(n log n) even to show 10 items.
+- Instead keep, per sortable field, a list of (value, id) kept sorted:
+    index["price"] = [(1, 2), (2, 3), (3, 1), ...]
+  built once, then maintained with bisect on add / remove / update.
+- Unfiltered sorted page = slice of the index: O(limit).
+  Filtered sorted page = one pass over the index in order: O(n), no sort.
+- Ties are broken by id (for order="desc" the index is read backwards,
+  so ties come highest id first).
+- Lowercased names are computed once per product, not per request.
+
+Keyset (cursor) pagination - get_products_by_cursor(limit, cursor, ...):
+- Offset paging pays for every skipped row: page 10,000 = 10,000 pages of work,
+  and an insert before the offset shifts every later page (duplicates/gaps).
+- Instead the client sends back the (sort_value, id) of the last item it saw;
+  bisect on the sorted index finds where the next page starts: O(log n + limit).
+- Inserts/removals elsewhere don't move that position, so deep crawls neither
+  repeat nor skip products that existed for the whole crawl.
+- The cursor is opaque (urlsafe base64 JSON) and bound to sort_by + order.
+
+Trigram search index:
+- `search in name.lower()` over every product is O(n * len(name)) per request.
+- Index every 3-character substring of each lowercased name:
+    "apple" -> {"app", "ppl", "ple"};  trigrams["ppl"] = {ids...}
+- A query of 3+ chars must contain all of ITS trigrams, so candidates =
+  intersection of those posting sets (smallest first, stop when empty).
+- Candidates are then verified with a real substring check: "abcxbcd" has
+  "abc" and "bcd" but doesn't contain "abcd".
+- 1-2 char queries have no trigram and fall back to the scan (they match a
+  large share of the catalog anyway).
+- Cost: O(sum of posting sizes) instead of O(n); ~len(name) set entries per product.
 """
 
+import base64
+import bisect
+import json
+import random
+import time
+from itertools import count
+
 
 class ProductAPI:
-    def __init__(self, products):
+    def __init__(self, products, sortable_fields=("name", "price")):
         # products = list of dicts: {"id":1, "name":"A", "price":10}
-        self.products = products
+        self.products = list(products)
 
-    def get_products(self, page, limit, search=None, sort_by=None, order="asc"):
-        items = self.products
+        # id -> product, id -> lowercased name (for search)
+        self._by_id = {p["id"]: p for p in self.products}
+        self._lower_names = {p["id"]: p["name"].lower() for p in self.products}
+
+        # field -> sorted [(value, id), ...]; "id" always has one for cursor paging
+        self._indexes = {
+            field: sorted((p[field], p["id"]) for p in self.products)
+            for field in dict.fromkeys(("id",) + tuple(sortable_fields))
+        }
 
-        # Filtering (search by name)
-        if search:
-            items = [p for p in items if search.lower() in p["name"].lower()]
+        # trigram -> {ids whose lowercased name contains it}
+        self._trigrams = {}
+        for product_id in self._lower_names:
+            self._index_name(product_id)
 
-        # Sorting
-        if sort_by:
-            reverse_order = (order == "desc")
-            items = sorted(items, key=lambda p: p[sort_by], reverse=reverse_order)
+        # id -> insertion sequence, to give unsorted search results in list order
+        self._sequence = count()
+        self._order = {p["id"]: next(self._sequence) for p in self.products}
 
-        total = len(items)
-        total_pages = (total + limit - 1) // limit  # ceil division
+    # ------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------
+    def _index_insert(self, product):
+        for field, index in self._indexes.items():
+            bisect.insort(index, (product[field], product["id"]))
+
+    @staticmethod
+    def _name_trigrams(lower_name):
+        return {lower_name[i:i + 3] for i in range(len(lower_name) - 2)}
+
+    def _index_name(self, product_id):
+        for gram in self._name_trigrams(self._lower_names[product_id]):
+            self._trigrams.setdefault(gram, set()).add(product_id)
+
+    def _unindex_name(self, product_id):
+        for gram in self._name_trigrams(self._lower_names[product_id]):
+            postings = self._trigrams[gram]
+            postings.discard(product_id)
+            if not postings:
+                del self._trigrams[gram]
+
+    def _index_remove(self, product, fields=None):
+        for field in fields if fields is not None else self._indexes:
+            index = self._indexes[field]
+            entry = (product[field], product["id"])
+            position = bisect.bisect_left(index, entry)
+            if position < len(index) and index[position] == entry:
+                del index[position]
+
+    def add_product(self, product):
+        if product["id"] in self._by_id:
+            raise ValueError(f"duplicate product id {product['id']}")
+
+        self.products.append(product)
+        self._by_id[product["id"]] = product
+        self._lower_names[product["id"]] = product["name"].lower()
+        self._order[product["id"]] = next(self._sequence)
+        self._index_insert(product)
+        self._index_name(product["id"])
+
+    def remove_product(self, product_id):
+        product = self._by_id.pop(product_id)
+        self._unindex_name(product_id)
+        del self._lower_names[product_id]
+        del self._order[product_id]
+        self._index_remove(product)
+        self.products.remove(product)
+
+    def update_product(self, product_id, **changes):
+        product = self._by_id[product_id]
+        if changes.get("id", product_id) != product_id:
+            raise ValueError("product id can't be changed")
 
-        # Pagination slicing
+        # Re-index only the fields whose value actually changes
+        moved = [f for f in self._indexes if f in changes and changes[f] != product[f]]
+        self._index_remove(product, moved)
+
+        product.update(changes)
+
+        lower_name = product["name"].lower()
+        if lower_name != self._lower_names[product_id]:
+            self._unindex_name(product_id)
+            self._lower_names[product_id] = lower_name
+            self._index_name(product_id)
+
+        for field in moved:
+            bisect.insort(self._indexes[field], (product[field], product_id))
+
+    # ------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------
+    def _matches(self, product_id, search):
+        return search in self._lower_names[product_id]
+
+    def _search_ids(self, search):
+        """
+        Ids whose name contains `search` (lowercased), via the trigram index.
+        None when the query is too short to have a trigram.
+        """
+        grams = self._name_trigrams(search)
+        if not grams:
+            return None
+
+        postings = []
+        for gram in grams:
+            ids = self._trigrams.get(gram)
+            if ids is None:
+                return set()
+            postings.append(ids)
+
+        # Smallest first: the running intersection only shrinks
+        postings.sort(key=len)
+        candidates = postings[0]
+        for ids in postings[1:]:
+            candidates = candidates & ids
+            if not candidates:
+                break
+
+        return {product_id for product_id in candidates if self._matches(product_id, search)}
+
+    def get_products(self, page, limit, search=None, sort_by=None, order="asc"):
         start = (page - 1) * limit
         end = start + limit
-        paginated_items = items[start:end]
+        search = search.lower() if search else None
+        matches = self._search_ids(search) if search else None
+
+        index = self._indexes.get(sort_by) if sort_by else None
+
+        if index is not None and not search:
+            # Index slice: O(limit)
+            total = len(index)
+            if order == "desc":
+                entries = index[max(0, total - end):max(0, total - start)][::-1]
+            else:
+                entries = index[start:end]
+            paginated_items = [self._by_id[product_id] for _, product_id in entries]
+
+        else:
+            if index is not None and matches is not None:
+                # Few verified matches: sort just those
+                entries = sorted(((self._by_id[i][sort_by], i) for i in matches), reverse=(order == "desc"))
+                items = [self._by_id[product_id] for _, product_id in entries]
+            elif index is not None:
+                # Walk the index in order instead of sorting the matches
+                ids = (product_id for _, product_id in (reversed(index) if order == "desc" else index))
+                items = [self._by_id[i] for i in ids if self._matches(i, search)]
+            else:
+                items = self.products
+
+                # Filtering (search by name), kept in list order
+                if matches is not None:
+                    items = [self._by_id[i] for i in sorted(matches, key=self._order.__getitem__)]
+                elif search:
+                    items = [p for p in items if self._matches(p["id"], search)]
+
+                # Sorting (field without an index)
+                if sort_by:
+                    reverse_order = (order == "desc")
+                    items = sorted(items, key=lambda p: p[sort_by], reverse=reverse_order)
+
+            total = len(items)
+
+            # Pagination slicing
+            paginated_items = items[start:end]
+
+        total_pages = (total + limit - 1) // limit  # ceil division
 
         return {
             "items": paginated_items,
@@ -51,19 +237,159 @@ class ProductAPI:
             "has_next": page < total_pages
         }
 
+    # ------------------------------------------------------------
+    # Keyset (cursor) pagination
+    # ------------------------------------------------------------
+    @staticmethod
+    def _encode_cursor(sort_by, order, last_entry):
+        payload = json.dumps([sort_by, order, *last_entry], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor, sort_by, order):
+        try:
+            cursor_sort_by, cursor_order, last_value, last_id = json.loads(base64.urlsafe_b64decode(cursor))
+        except (ValueError, TypeError):
+            raise ValueError("invalid cursor")
+
+        if (cursor_sort_by, cursor_order) != (sort_by, order):
+            raise ValueError("cursor was issued for a different sort_by/order")
+        return last_value, last_id
+
+    def get_products_by_cursor(self, limit, cursor=None, search=None, sort_by=None, order="asc"):
+        """
+        Next `limit` products after the cursor (first page when cursor is None).
+
+        Returns {"items": [...], "next_cursor": str or None, "has_next": bool}.
+        sort_by=None orders by id.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        sort_by = sort_by or "id"
+        index = self._indexes.get(sort_by)
+        if index is None:
+            raise ValueError(f"cursor pagination needs an index on {sort_by!r}")
+
+        search = search.lower() if search else None
+        descending = order == "desc"
+
+        matches = self._search_ids(search) if search else None
+        if matches is not None:
+            # Page through just the verified matches, same (value, id) order
+            index = sorted((self._by_id[i][sort_by], i) for i in matches)
+            search = None
+
+        # First index position of the page (walking backwards when descending)
+        if cursor is None:
+            position = len(index) - 1 if descending else 0
+        else:
+            last_entry = tuple(self._decode_cursor(cursor, sort_by, order))
+            if descending:
+                position = bisect.bisect_left(index, last_entry) - 1
+            else:
+                position = bisect.bisect_right(index, last_entry)
+
+        step = -1 if descending else 1
+        entries = []
+
+        # One extra match tells whether there's a next page
+        while 0 <= position < len(index) and len(entries) <= limit:
+            entry = index[position]
+            if not search or self._matches(entry[1], search):
+                entries.append(entry)
+            position += step
+
+        has_next = len(entries) > limit
+        entries = entries[:limit]
+
+        return {
+            "items": [self._by_id[product_id] for _, product_id in entries],
+            "next_cursor": self._encode_cursor(sort_by, order, entries[-1]) if has_next else None,
+            "has_next": has_next
+        }
+
+
+def benchmark_search(catalog_sizes=(10_000, 100_000, 300_000), num_queries: int = 200, seed: int = 42):
+    """
+    Avg ms per search request (first page, 20 items): full scan with
+    lower() per product vs trigram index, across catalog sizes.
+    """
+    rng = random.Random(seed)
+    syllables = ["ap", "ple", "ba", "na", "car", "rot", "avo", "ca", "do", "pri",
+                 "cot", "ber", "ry", "mel", "on", "tan", "ger", "ine", "lem", "kiw"]
+
+    print("=== SEARCH: ms/request ===")
+    print("products  |    scan | trigram | speedup")
+
+    for size in catalog_sizes:
+        products = [
+            {"id": i,
+             "name": " ".join("".join(rng.choices(syllables, k=rng.randint(2, 4))).title() for _ in range(2)),
+             "price": rng.randint(1, 500)}
+            for i in range(size)
+        ]
+        api = ProductAPI(products)
+
+        # Substrings of real names (3-8 chars) plus some that match nothing
+        queries = []
+        for _ in range(num_queries):
+            name = rng.choice(products)["name"].lower()
+            length = rng.randint(3, 8)
+            offset = rng.randint(0, max(0, len(name) - length))
+            queries.append(name[offset:offset + length] if rng.random() < 0.9 else "zqx" + name[:3])
+
+        # The previous per-request path: lower() on every name, every request
+        start = time.perf_counter()
+        for query in queries:
+            items = [p for p in products if query in p["name"].lower()]
+            items[:20]
+        scan_ms = (time.perf_counter() - start) * 1000 / num_queries
+
+        start = time.perf_counter()
+        for query in queries:
+            api.get_products(page=1, limit=20, search=query)
+        index_ms = (time.perf_counter() - start) * 1000 / num_queries
+
+        print(f"{size:9,d} | {scan_ms:7.2f} | {index_ms:7.2f} | {scan_ms / index_ms:6.1f}x")
+
 
 # ------------------ TEST -------------------
 
-products = [
-    {"id": 1, "name": "Apple", "price": 3},
-    {"id": 2, "name": "Banana", "price": 1},
-    {"id": 3, "name": "Carrot", "price": 2},
-    {"id": 4, "name": "Apricot", "price": 5},
-    {"id": 5, "name": "Avocado", "price": 4}
-]
-
-api = ProductAPI(products)
-print(api.get_products(page=1, limit=2, search="a", sort_by="price"))
-print(api.get_products(page=2, limit=2, search="a", sort_by="price"))
-print(api.get_products(page=3, limit=2, search="a", sort_by="price"))
-print(api.get_products(page=4, limit=2, search="a", sort_by="price"))
+if __name__ == "__main__":
+    products = [
+        {"id": 1, "name": "Apple", "price": 3},
+        {"id": 2, "name": "Banana", "price": 1},
+        {"id": 3, "name": "Carrot", "price": 2},
+        {"id": 4, "name": "Apricot", "price": 5},
+        {"id": 5, "name": "Avocado", "price": 4}
+    ]
+
+    api = ProductAPI(products)
+    print(api.get_products(page=1, limit=2, search="a", sort_by="price"))
+    print(api.get_products(page=2, limit=2, search="a", sort_by="price"))
+    print(api.get_products(page=3, limit=2, search="a", sort_by="price"))
+    print(api.get_products(page=4, limit=2, search="a", sort_by="price"))
+
+    # Unfiltered sorted page straight from the index
+    print(api.get_products(page=1, limit=2, sort_by="price", order="desc")["items"])  # Apricot, Avocado
+
+    # Indexes follow changes
+    api.add_product({"id": 6, "name": "Date", "price": 0})
+    api.update_product(4, price=0.5)
+    api.remove_product(2)
+    print([p["name"] for p in api.get_products(page=1, limit=3, sort_by="price")["items"]])
+    # ['Date', 'Apricot', 'Carrot']
+
+    # Cursor pagination: an insert between pages doesn't shift the next page
+    first = api.get_products_by_cursor(limit=2, sort_by="price")
+    print([p["name"] for p in first["items"]])  # ['Date', 'Apricot']
+    api.add_product({"id": 7, "name": "Elderberry", "price": 0.1})  # sorts before the cursor
+    second = api.get_products_by_cursor(limit=2, cursor=first["next_cursor"], sort_by="price")
+    print([p["name"] for p in second["items"]], second["has_next"])  # ['Carrot', 'Apple'] True
+
+    # Trigram search: "apr" -> posting set of "apr"; "ap" is too short -> scan
+    print([p["name"] for p in api.get_products(page=1, limit=5, search="APR")["items"]])  # ['Apricot']
+    print(api.get_products(page=1, limit=5, search="ap")["total"])  # 2
+
+    benchmark_search()
@@ -0,0 +1,154 @@
+import asyncio
+import math
+import random
+import time
+
+try:
+    from problems.api.kvStoreAPI import KeyValueStoreImproved
+except ModuleNotFoundError:
+    # Run as a script (python path/to/this_file.py): the sibling module is on sys.path
+    from kvStoreAPI import KeyValueStoreImproved
+
+"""
+asyncio facade for the TTL Key-Value Store with get-or-compute.
+
+🧠 Intuition
+    Cache-aside in an async service:
+        value = cache.get(key)
+        if value is None:
+            value = await load()      # DB / HTTP call
+            cache.put(key, value, ttl)
+
+    When a popular key expires, every concurrent request misses at once and
+    runs load() - a thundering herd on the backend.
+
+    Two fixes:
+    1. Request coalescing
+       The first miss starts ONE computation and parks an asyncio.Future in
+       _in_flight[key]; every other miss for that key awaits the same future.
+
+    2. Probabilistic early refresh (XFetch, Vattani et al. 2015)
+       Each hit recomputes early with a probability that rises as expiry
+       approaches and with how long the value took to compute (delta):
+           refresh if now - delta * beta * ln(rand()) >= expire_time
+       Hot keys get renewed in the background before they ever expire,
+       while callers keep getting the current value.
+
+⏱ Complexity
+    get_or_set hit: O(1) + store lookup
+    miss: one computation per key, regardless of concurrent callers
+"""
+
+
+class AsyncKeyValueStore:
+    def __init__(self, store=None, beta=1.0):
+        # Synchronous backing store; entries are (value, delta, expire_time)
+        self.store = store if store is not None else KeyValueStoreImproved()
+
+        # XFetch aggressiveness: 0 disables early refresh, >1 refreshes earlier
+        self.beta = beta
+
+        # key -> Future shared by every caller waiting on that computation
+        self._in_flight = {}
+
+        # Strong refs: the event loop only keeps weak references to tasks
+        self._tasks = set()
+
+    async def get(self, key):
+        entry = self.store.get(key)
+        return None if entry is None else entry[0]
+
+    async def put(self, key, value, ttl_seconds):
+        self.store.put(key, (value, 0.0, time.time() + ttl_seconds), ttl_seconds)
+
+    async def delete(self, key):
+        self.store.delete(key)
+
+    def _should_refresh_early(self, delta, expire_time, now):
+        if self.beta <= 0 or delta <= 0:
+            return False
+        # 1 - random() is in (0, 1], so log() is defined
+        return now - delta * self.beta * math.log(1.0 - random.random()) >= expire_time
+
+    async def _compute(self, key, coro_factory, ttl_seconds, future):
+        try:
+            start = time.monotonic()
+            value = await coro_factory()
+            delta = time.monotonic() - start
+
+            expire_time = time.time() + ttl_seconds
+            self.store.put(key, (value, delta, expire_time), ttl_seconds)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(value)
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _start(self, key, coro_factory, ttl_seconds):
+        """
+        Start the single computation for key, or join the one in flight.
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception retrieved even if nobody awaits (background refresh)
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+
+        task = asyncio.ensure_future(self._compute(key, coro_factory, ttl_seconds, future))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return future
+
+    async def get_or_set(self, key, coro_factory, ttl_seconds):
+        """
+        Return the cached value, or await coro_factory() exactly once across
+        all concurrent callers and cache the result for ttl_seconds.
+        """
+        entry = self.store.get(key)
+
+        if entry is not None:
+            value, delta, expire_time = entry
+
+            if self._should_refresh_early(delta, expire_time, time.time()):
+                # Renew in the background; this caller still gets the hit
+                self._start(key, coro_factory, ttl_seconds)
+
+            return value
+
+        # shield: one caller being cancelled must not cancel the shared work
+        return await asyncio.shield(self._start(key, coro_factory, ttl_seconds))
+
+
+if __name__ == "__main__":
+    calls = 0
+
+    async def load_profile():
+        global calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return {"id": 42, "name": "alice"}
+
+    async def main():
+        cache = AsyncKeyValueStore(beta=1.0)
+
+        # 100 concurrent misses -> one backend call
+        results = await asyncio.gather(
+            *(cache.get_or_set("profile:42", load_profile, ttl_seconds=0.5) for _ in range(100))
+        )
+        print(results[0], "backend calls:", calls)  # {...} backend calls: 1
+
+        # Keep hitting the hot key past its TTL: XFetch renews it early,
+        # so callers never see a miss
+        for _ in range(20):
+            await cache.get_or_set("profile:42", load_profile, ttl_seconds=0.5)
+            await asyncio.sleep(0.05)
+        print("backend calls after 1s of hits:", calls)  # a few background refreshes
+
+    asyncio.run(main())
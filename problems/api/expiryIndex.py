@@ -0,0 +1,451 @@
+import heapq
+import math
+import random
+import time
+
+"""
+Expiry indexes for the TTL Key-Value Store.
+
+An expiry index answers one question:
+"Which keys have expired by time `now`?"
+
+Interface (shared by every backend):
+- schedule(key, expire_time)   add, or replace the key's previous deadline
+- cancel(key)                  forget the key (deleted / evicted)
+- pop_expired(now, limit)      remove and return expired keys
+- next_deadline()              earliest time something may expire (or None)
+- peek_earliest()              a key with the earliest deadline (or None)
+- len(index)                   number of live (scheduled) keys
+
+HeapExpiryIndex can also attach(entries) to its owner's key -> entry map and
+read deadlines from entry.expire_time instead of keeping its own copy.
+
+Backends:
+1. HeapExpiryIndex        - min-heap of (expire_time, key), lazy deletion
+2. TimingWheelExpiryIndex - hashed hierarchical timing wheel, O(1) schedule/cancel
+"""
+
+
+# ============================================================
+# 1️⃣ MIN-HEAP INDEX
+# ============================================================
+class HeapExpiryIndex:
+    """
+    Min-heap ordered by expire_time.
+
+    Overwrites and cancels are lazy:
+    - the old (expire_time, key) tuple stays in the heap ("stale")
+    - it is skipped when popped because it no longer matches the key's
+      current deadline (_deadlines, or the attached entry's expire_time)
+
+    Hot keys refreshed every few seconds make stale tuples pile up far
+    faster than they are popped, so once stale entries exceed
+    `compact_threshold` of the heap it is rebuilt from the live deadlines
+    with heapify (O(live)).
+
+    ⏱ Complexity
+        schedule: O(log n)      cancel: O(1) (lazy)
+        pop_expired: O(k log n) for k popped entries (live + stale)
+        compaction: O(live), amortized O(1) per stale entry
+    """
+
+    def __init__(self, compact_threshold=0.5, min_compact_size=1024):
+        if not 0 < compact_threshold < 1:
+            raise ValueError("compact_threshold must be between 0 and 1")
+
+        # Min-heap: [(expire_time, key)] - may hold stale entries
+        self.heap = []
+
+        # key -> current expire_time (source of truth for "live")...
+        self._deadlines = {}
+        # ...unless attach() points it at the owner's key -> entry map
+        self._entries = None
+
+        # Rebuild when stale / heap size exceeds this fraction...
+        self.compact_threshold = compact_threshold
+        # ...but never bother for tiny heaps
+        self.min_compact_size = min_compact_size
+
+        self.compactions = 0
+
+    def __len__(self):
+        return len(self._deadlines if self._entries is None else self._entries)
+
+    def attach(self, entries):
+        """
+        Read deadlines from `entries` (key -> object with .expire_time)
+        instead of a private key -> deadline dict, so the owner's store is
+        the only per-key structure. The owner must then write the entry
+        before schedule(), and remove it before cancel() / after pop_expired().
+        """
+        if self.heap or self._deadlines:
+            raise ValueError("attach() needs an empty index")
+
+        self._entries = entries
+
+    def schedule(self, key, expire_time):
+        if self._entries is None:
+            self._deadlines[key] = expire_time
+        heapq.heappush(self.heap, (expire_time, key))
+        self._maybe_compact()
+
+    def cancel(self, key):
+        if self._entries is not None or self._deadlines.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        heap_size = len(self.heap)
+        if heap_size < self.min_compact_size:
+            return
+
+        stale = heap_size - len(self)
+        if stale > self.compact_threshold * heap_size:
+            self.compact()
+
+    def compact(self):
+        """
+        Drop every stale entry: rebuild the heap from live deadlines only.
+        """
+        if self._entries is None:
+            self.heap = [(expire_time, key) for key, expire_time in self._deadlines.items()]
+        else:
+            self.heap = [(entry.expire_time, key) for key, entry in self._entries.items()]
+        heapq.heapify(self.heap)
+        self.compactions += 1
+
+    def stats(self):
+        return {
+            "heap_size": len(self.heap),
+            "live": len(self),
+            "stale": len(self.heap) - len(self),
+            "compactions": self.compactions,
+        }
+
+    def _is_live(self, expire_time, key):
+        if self._entries is None:
+            return self._deadlines.get(key) == expire_time
+
+        entry = self._entries.get(key)
+        return entry is not None and entry.expire_time == expire_time
+
+    def next_deadline(self):
+        # Drop stale entries sitting on top so the answer is exact
+        while self.heap and not self._is_live(*self.heap[0]):
+            heapq.heappop(self.heap)
+
+        return self.heap[0][0] if self.heap else None
+
+    def peek_earliest(self):
+        self.next_deadline()  # drops stale top entries
+        return self.heap[0][1] if self.heap else None
+
+    def pop_expired(self, now, limit=None):
+        """
+        Pop expired keys in order of expiry.
+        limit bounds the number of heap entries popped (live or stale).
+        """
+        expired = []
+        popped = 0
+
+        while self.heap and self.heap[0][0] <= now:
+            if limit is not None and popped >= limit:
+                break
+
+            expire_time, key = heapq.heappop(self.heap)
+            popped += 1
+
+            # Only a live entry expires the key (overwrites leave stale tuples)
+            if self._is_live(expire_time, key):
+                if self._entries is None:
+                    del self._deadlines[key]
+                else:
+                    # The owner drops the entry only after we return: skip
+                    # identical tuples (same-deadline overwrite) right now
+                    while self.heap and self.heap[0] == (expire_time, key):
+                        heapq.heappop(self.heap)
+                        popped += 1
+                expired.append(key)
+
+        return expired
+
+
+# ============================================================
+# 2️⃣ HIERARCHICAL TIMING WHEEL INDEX
+# ============================================================
+class TimingWheelExpiryIndex:
+    """
+    Hashed hierarchical timing wheel (Varghese & Lauck, as used by the
+    Linux kernel timers and Kafka's purgatory).
+
+    🧠 Intuition
+        Time is cut into ticks of `tick_seconds`.
+        Level 0 has `2^wheel_bits` slots, one per tick.
+        Level 1 slots each cover a full level-0 rotation, and so on.
+
+        A key lives in exactly one slot (a dict), and _where remembers which,
+        so schedule/cancel are dict operations - no stale entries on overwrite.
+
+        When a level-l rotation boundary is crossed, the matching level-(l+1)
+        slot is "cascaded": its keys are re-placed into finer levels.
+
+    ⏱ Complexity
+        schedule / cancel: O(1)
+        pop_expired: O(ticks advanced + keys cascaded), with empty lower levels
+                     skipped in one jump
+
+    ⚠️ Expiry is tick-granular: a key is reported at most one tick late,
+       never early.
+    """
+
+    _READY = -1
+
+    def __init__(self, tick_seconds=0.01, wheel_bits=8, levels=4, start_time=None):
+        if tick_seconds <= 0:
+            raise ValueError("tick_seconds must be positive")
+
+        self.tick_seconds = tick_seconds
+        self.wheel_bits = wheel_bits
+        self.levels = levels
+        self._mask = (1 << wheel_bits) - 1
+
+        if start_time is None:
+            start_time = time.time()
+        self._current_tick = math.floor(start_time / tick_seconds)
+
+        # _wheels[level][slot] -> {key: expire_time}
+        self._wheels = [[{} for _ in range(1 << wheel_bits)] for _ in range(levels)]
+
+        # Keys beyond the top level's range (re-placed on each top rotation)
+        self._overflow = {}
+
+        # Keys whose tick has passed, waiting to be popped
+        self._ready = {}
+
+        # key -> location: _READY, or (level << wheel_bits | slot);
+        #                  level == levels means overflow
+        self._where = {}
+
+        # Number of keys per level (index `levels` = overflow)
+        self._level_counts = [0] * (levels + 1)
+
+    def __len__(self):
+        return len(self._where)
+
+    def _tick_of(self, expire_time):
+        # ceil => a key is never reported before its expire_time
+        return math.ceil(expire_time / self.tick_seconds)
+
+    def _place(self, key, expire_time):
+        expire_tick = self._tick_of(expire_time)
+        current = self._current_tick
+
+        if expire_tick <= current:
+            self._ready[key] = expire_time
+            self._where[key] = self._READY
+            return
+
+        bits = self.wheel_bits
+
+        # Pick the finest level whose parent block also contains `current`
+        for level in range(self.levels):
+            parent_shift = bits * (level + 1)
+            if (expire_tick >> parent_shift) == (current >> parent_shift):
+                slot = (expire_tick >> (bits * level)) & self._mask
+                self._wheels[level][slot][key] = expire_time
+                self._where[key] = (level << bits) | slot
+                self._level_counts[level] += 1
+                return
+
+        self._overflow[key] = expire_time
+        self._where[key] = self.levels << bits
+        self._level_counts[self.levels] += 1
+
+    def schedule(self, key, expire_time):
+        # Replace, never duplicate: the old slot entry is removed in O(1)
+        self.cancel(key)
+        self._place(key, expire_time)
+
+    def cancel(self, key):
+        location = self._where.pop(key, None)
+        if location is None:
+            return
+
+        if location == self._READY:
+            del self._ready[key]
+            return
+
+        level = location >> self.wheel_bits
+        if level == self.levels:
+            del self._overflow[key]
+        else:
+            del self._wheels[level][location & self._mask][key]
+        self._level_counts[level] -= 1
+
+    def stats(self):
+        return {
+            "live": len(self._where),
+            "ready": len(self._ready),
+            "per_level": list(self._level_counts),
+        }
+
+    def _lowest_busy_level(self):
+        for level, count in enumerate(self._level_counts):
+            if count:
+                return level
+        return None
+
+    def _cascade(self, level):
+        """
+        Re-place every key of the level slot that starts at the current tick.
+        """
+        if level == self.levels:
+            bucket, self._overflow = self._overflow, {}
+        else:
+            slot = (self._current_tick >> (self.wheel_bits * level)) & self._mask
+            bucket = self._wheels[level][slot]
+            self._wheels[level][slot] = {}
+
+        self._level_counts[level] -= len(bucket)
+        for key, expire_time in bucket.items():
+            self._place(key, expire_time)
+
+    def _advance(self, target_tick):
+        bits = self.wheel_bits
+
+        while self._current_tick < target_tick:
+            lowest = self._lowest_busy_level()
+
+            if lowest is None:
+                # Nothing scheduled: jump straight to the target
+                self._current_tick = target_tick
+                break
+
+            if lowest > 0:
+                # Levels below `lowest` are empty: nothing happens until the
+                # next `lowest`-level boundary, so jump there in one step
+                span = 1 << (bits * lowest)
+                next_boundary = (self._current_tick // span + 1) * span
+                if next_boundary > target_tick:
+                    self._current_tick = target_tick
+                    break
+                self._current_tick = next_boundary
+            else:
+                self._current_tick += 1
+
+            tick = self._current_tick
+
+            # Cascade coarse -> fine so re-placed keys can cascade again
+            for level in range(self.levels, 0, -1):
+                if tick % (1 << (bits * level)) == 0 and self._level_counts[level]:
+                    self._cascade(level)
+
+            # Level-0 slot for this tick is due
+            slot = tick & self._mask
+            bucket = self._wheels[0][slot]
+            if bucket:
+                self._wheels[0][slot] = {}
+                self._level_counts[0] -= len(bucket)
+                for key, expire_time in bucket.items():
+                    self._ready[key] = expire_time
+                    self._where[key] = self._READY
+
+    def next_deadline(self):
+        """
+        Lower bound on the next expiry (tick-granular), or None if empty.
+        """
+        if self._ready:
+            return self._current_tick * self.tick_seconds
+
+        lowest = self._lowest_busy_level()
+        if lowest is None:
+            return None
+
+        span = 1 << (self.wheel_bits * lowest)
+        next_tick = (self._current_tick // span + 1) * span
+        return next_tick * self.tick_seconds
+
+    def peek_earliest(self):
+        """
+        A key from the earliest non-empty slot (exact at level 0,
+        within one slot's span at coarser levels), or None if empty.
+        """
+        if self._ready:
+            return next(iter(self._ready))
+
+        bits = self.wheel_bits
+        for level in range(self.levels):
+            if not self._level_counts[level]:
+                continue
+
+            # Walk slots forward from the current position at this level
+            position = self._current_tick >> (bits * level)
+            for step in range(1, (1 << bits) + 1):
+                bucket = self._wheels[level][(position + step) & self._mask]
+                if bucket:
+                    return next(iter(bucket))
+
+        if self._overflow:
+            return min(self._overflow, key=self._overflow.get)
+
+        return None
+
+    def pop_expired(self, now, limit=None):
+        self._advance(math.floor(now / self.tick_seconds))
+
+        expired = []
+        while self._ready and (limit is None or len(expired) < limit):
+            key, _ = self._ready.popitem()
+            del self._where[key]
+            expired.append(key)
+
+        return expired
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def benchmark_expiry_indexes(num_keys=10 ** 6, overwrites_per_key=3, max_ttl=60.0):
+    """
+    Heavy-overwrite workload: num_keys keys, each rescheduled
+    overwrites_per_key more times, then half of the TTL range expires.
+    """
+    rng = random.Random(42)
+    start = 1_000_000.0
+    schedule_ops = [
+        (rng.randrange(num_keys), start + rng.uniform(1.0, max_ttl))
+        for _ in range(num_keys * (1 + overwrites_per_key))
+    ]
+
+    print(f"{num_keys:,} keys, {len(schedule_ops):,} schedule calls")
+    print("backend         | schedule ops/s | entries held | pop_expired (s) | expired")
+
+    for name, index in (
+        ("heap (no compact)", HeapExpiryIndex(min_compact_size=float("inf"))),
+        ("heap (compact)", HeapExpiryIndex()),
+        ("timing wheel", TimingWheelExpiryIndex(tick_seconds=0.01, start_time=start)),
+    ):
+        t0 = time.perf_counter()
+        for key, expire_time in schedule_ops:
+            index.schedule(key, expire_time)
+        schedule_elapsed = time.perf_counter() - t0
+
+        held = len(index.heap) if isinstance(index, HeapExpiryIndex) else len(index)
+
+        t0 = time.perf_counter()
+        expired = index.pop_expired(start + max_ttl / 2)
+        pop_elapsed = time.perf_counter() - t0
+
+        print(f"{name:17s} | {len(schedule_ops) / schedule_elapsed:14,.0f} | "
+              f"{held:12,d} | {pop_elapsed:15.3f} | {len(expired):,d}")
+
+
+if __name__ == "__main__":
+    wheel = TimingWheelExpiryIndex(tick_seconds=1.0, start_time=0.0)
+    wheel.schedule("a", 5.0)
+    wheel.schedule("b", 300.0)   # level 1
+    wheel.schedule("a", 70000.0) # overwrite: level 2, no stale entry left behind
+    print(wheel.pop_expired(10.0))      # []
+    print(wheel.pop_expired(300.0))     # ['b']
+    print(wheel.pop_expired(70000.0))   # ['a']
+
+    benchmark_expiry_indexes()
@@ -1,5 +1,16 @@
 import heapq
+import random
+import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from problems.api.expiryIndex import HeapExpiryIndex, TimingWheelExpiryIndex
+except ModuleNotFoundError:
+    # Run as a script (python path/to/this_file.py): the sibling module is on sys.path
+    from expiryIndex import HeapExpiryIndex, TimingWheelExpiryIndex
 
 """
 Design a Key-Value Store API with TTL.
@@ -87,18 +98,19 @@ class KeyValueStore:
 
 # ---------------- TESTING ----------------
 
-kv = KeyValueStore()
-kv.put("session", "abc123", ttl_seconds=3)
-print("Get session:", kv.get("session"))  # "abc123"
+if __name__ == "__main__":
+    kv = KeyValueStore()
+    kv.put("session", "abc123", ttl_seconds=3)
+    print("Get session:", kv.get("session"))  # "abc123"
 
-time.sleep(4)
-print("After expiry:", kv.get("session"))  # None
+    time.sleep(4)
+    print("After expiry:", kv.get("session"))  # None
 
-kv.put("k1", "v1", ttl_seconds=10)
-kv.put("k2", "v2", ttl_seconds=1)
-time.sleep(2)
-print("k1 still valid:", kv.get("k1"))  # v1
-print("k2 expired:", kv.get("k2"))  # None
+    kv.put("k1", "v1", ttl_seconds=10)
+    kv.put("k2", "v2", ttl_seconds=1)
+    time.sleep(2)
+    print("k1 still valid:", kv.get("k1"))  # v1
+    print("k2 expired:", kv.get("k2"))  # None
 
 
 # Improved version
@@ -111,42 +123,189 @@ Key principles:
 - ALL expiration deletions happen ONLY inside _cleanup()
 - get(), put(), delete() NEVER delete expired keys directly
 - Every public API method calls _cleanup() first
+
+Expiry bookkeeping lives in a pluggable expiry index (see expiryIndex.py):
+- HeapExpiryIndex (default)   - min-heap of (expire_time, key)
+- TimingWheelExpiryIndex      - O(1) schedule/cancel, no stale entries
+
+Optional memory bound (max_bytes / max_entries):
+TTL alone doesn't protect against a spike of long-TTL keys, so once the
+budget is hit entries are evicted by `eviction_policy`:
+- "lru": least recently used  -> store is an OrderedDict kept in recency order
+- "lfu": least frequently used -> approximate: lowest hits among
+         `eviction_samples` RANDOM entries (Redis-style sampling); a key list
+         with swap-remove gives O(1) random picks
+- "ttl": earliest expiry first -> asks the expiry index, no extra structure
+
+Per-key metadata (size, hits, sample slot) lives on the store entry itself,
+and the default heap index reads deadlines from entry.expire_time too
+(HeapExpiryIndex.attach) instead of keeping its own key -> deadline dict.
+Without a budget none of it is maintained: no recency reordering on get,
+no size measurement on put (stats()["bytes"] is then None).
 """
 
 
+class _Entry:
+    __slots__ = ("value", "expire_time", "size", "hits", "slot")
+
+    def __init__(self, value, expire_time, size):
+        self.value = value
+        self.expire_time = expire_time
+        self.size = size
+        self.hits = 0
+        self.slot = None
+
+
+def approximate_size(key, value):
+    """
+    Shallow size in bytes of key + value (containers are not walked).
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
 class KeyValueStoreImproved:
-    def __init__(self):
-        # HashMap: key -> (value, expire_time)
-        self.store = {}
+    EVICTION_POLICIES = ("lru", "lfu", "ttl")
 
-        # Min-heap sorted by expire_time: [(expire_time, key)]
-        self.expire_heap = []
+    def __init__(self, expiry_index=None, max_bytes=None, max_entries=None,
+                 eviction_policy="lru", sizeof=approximate_size, eviction_samples=5):
+        if eviction_policy not in self.EVICTION_POLICIES:
+            raise ValueError(f"eviction_policy must be one of {self.EVICTION_POLICIES}")
 
-    def _cleanup(self):
+        self.eviction_policy = eviction_policy
+
+        # Eviction bookkeeping only when there is a budget to enforce
+        bounded = max_bytes is not None or max_entries is not None
+        self._tracked_policy = eviction_policy if bounded else None
+        self._tracks_bytes = max_bytes is not None
+
+        # HashMap: key -> _Entry(value, expire_time, size, hits, slot)
+        # (OrderedDict in recency order for LRU)
+        self.store = OrderedDict() if self._tracked_policy == "lru" else {}
+
+        # LFU: every key once, entry.slot = its position (random sampling)
+        self._sample_keys = []
+
+        # Expiry index: which keys expire when
+        self.expiry_index = expiry_index if expiry_index is not None else HeapExpiryIndex()
+        if isinstance(self.expiry_index, HeapExpiryIndex):
+            # Liveness = entry.expire_time, no second key -> deadline map
+            self.expiry_index.attach(self.store)
+
+        # Memory budget (None = unbounded)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+        self.eviction_samples = eviction_samples
+
+        self.total_bytes = 0
+        self.evictions = 0
+
+    @property
+    def expire_heap(self):
         """
-        Singular cleanup point for expired keys.
+        Min-heap [(expire_time, key)] of the default heap index
+        (None for other indexes - use stats() for their counts).
+        """
+        return getattr(self.expiry_index, "heap", None)
 
-        Removes all expired entries from both:
-        - store (hash map)
-        - expire_heap (min-heap)
+    # ---------------- INTERNAL HELPERS ----------------
 
-        Only deletes a key if:
-        - heap says it's expired, AND
-        - store expiration matches the heap timestamp
+    def _drop(self, key):
         """
-        now = time.time()
+        Remove key from the store only (index already forgot it).
+        """
+        entry = self.store.pop(key)
+        self.total_bytes -= entry.size
 
-        # Keep removing expired keys in order of earliest expiry
-        while self.expire_heap and self.expire_heap[0][0] <= now:
-            expire_time, key = heapq.heappop(self.expire_heap)
+        if entry.slot is not None:
+            # Swap-remove: move the last key into the freed slot
+            last_key = self._sample_keys.pop()
+            if entry.slot < len(self._sample_keys):
+                self._sample_keys[entry.slot] = last_key
+                self.store[last_key].slot = entry.slot
 
-            # Ensure key still exists AND timestamps match
-            if key in self.store:
-                _, current_expire = self.store[key]
+    def _remove(self, key):
+        """
+        Remove key from store + expiry index, if present.
+        """
+        if key in self.store:
+            self._drop(key)
+            self.expiry_index.cancel(key)
 
-                # Only delete if heap timestamp matches store timestamp
-                if expire_time == current_expire:
-                    del self.store[key]
+    def _insert(self, key, value, expire_time):
+        """
+        Write one entry, (re)schedule its expiry, then enforce the budget.
+        """
+        previous = self.store.get(key)
+        self._remove(key)  # overwrite => old size no longer counts
+
+        entry = _Entry(value, expire_time, self.sizeof(key, value) if self._tracks_bytes else 0)
+        if previous is not None:
+            entry.hits = previous.hits  # LFU: an overwrite keeps its popularity
+
+        if self._tracked_policy == "lfu":
+            entry.slot = len(self._sample_keys)
+            self._sample_keys.append(key)
+
+        self.store[key] = entry
+        self.total_bytes += entry.size
+
+        # (Re)schedule in the expiry index for time-based cleanup
+        self.expiry_index.schedule(key, expire_time)
+
+        self._enforce_budget()
+
+    def _touch(self, key, entry):
+        """
+        Record a read hit for the eviction policy.
+        """
+        if self._tracked_policy == "lru":
+            self.store.move_to_end(key)
+        elif self._tracked_policy == "lfu":
+            entry.hits += 1
+
+    def _over_budget(self):
+        if self.max_entries is not None and len(self.store) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.total_bytes > self.max_bytes
+
+    def _pick_victim(self):
+        if self.eviction_policy == "lru":
+            # Front of the OrderedDict = least recently used
+            return next(iter(self.store))
+
+        if self.eviction_policy == "lfu":
+            # Random sample: dict order would always offer the oldest keys
+            keys = self._sample_keys
+            sample = (keys[random.randrange(len(keys))] for _ in range(self.eviction_samples))
+            return min(sample, key=lambda key: self.store[key].hits)
+
+        # "ttl": earliest expiry first, straight from the expiry index
+        return self.expiry_index.peek_earliest()
+
+    def _evict(self, key):
+        """
+        Remove one budget victim (subclasses hook in here, e.g. to log it).
+        """
+        self._remove(key)
+        self.evictions += 1
+
+    def _enforce_budget(self):
+        while self.store and self._over_budget():
+            self._evict(self._pick_victim())
+
+    def _cleanup(self):
+        """
+        Singular cleanup point for expired keys.
+
+        Asks the expiry index for every key whose deadline has passed
+        and removes it from the store. The index only reports a key for
+        its *current* deadline, so overwrites are handled there.
+        """
+        for key in self.expiry_index.pop_expired(time.time()):
+            self._drop(key)
+
+    # ---------------- PUBLIC API ----------------
 
     def put(self, key, value, ttl_seconds):
         """
@@ -154,13 +313,7 @@ class KeyValueStoreImproved:
         """
         self._cleanup()  # ensure store is clean first
 
-        expire_time = time.time() + ttl_seconds
-
-        # Save in hashmap
-        self.store[key] = (value, expire_time)
-
-        # Push into heap for time-based cleanup
-        heapq.heappush(self.expire_heap, (expire_time, key))
+        self._insert(key, value, time.time() + ttl_seconds)
 
     def get(self, key):
         """
@@ -168,13 +321,17 @@ class KeyValueStoreImproved:
         """
         self._cleanup()  # singular cleanup
 
-        if key not in self.store:
+        entry = self.store.get(key)
+        if entry is None:
             return None
 
-        value, expire_time = self.store[key]
+        # Tick-granular indexes (timing wheel) may report a key up to one
+        # tick late, so don't return it in that gap
+        if entry.expire_time <= time.time():
+            return None
 
-        # Expiration already handled in _cleanup() => ALWAYS safe to return
-        return value
+        self._touch(key, entry)
+        return entry.value
 
     def delete(self, key):
         """
@@ -182,8 +339,383 @@ class KeyValueStoreImproved:
         """
         self._cleanup()  # always clean before deletion
 
-        if key in self.store:
-            del self.store[key]
+        self._remove(key)
+
+    # ---------------- BULK API ----------------
+    # One cleanup pass per batch instead of one per key:
+    # O(cleanup + k) instead of O(k * cleanup)
+
+    def get_many(self, keys):
+        """
+        Return values for keys in input order (None for missing/expired).
+        """
+        self._cleanup()
+
+        now = time.time()
+        results = []
+        for key in keys:
+            entry = self.store.get(key)
+            if entry is None or entry.expire_time <= now:
+                results.append(None)
+            else:
+                self._touch(key, entry)
+                results.append(entry.value)
+        return results
+
+    def put_many(self, items, ttl_seconds=None):
+        """
+        Insert/update many keys.
+
+        items:
+        - with ttl_seconds: dict or iterable of (key, value), shared TTL
+        - without:          iterable of (key, value, ttl_seconds), per-key TTL
+        """
+        self._cleanup()
+
+        if isinstance(items, dict):
+            items = items.items()
+
+        now = time.time()
+        for item in items:
+            if ttl_seconds is None:
+                key, value, ttl = item
+            else:
+                key, value = item
+                ttl = ttl_seconds
+
+            self._insert(key, value, now + ttl)
+
+    def delete_many(self, keys):
+        """
+        Delete many keys immediately.
+        """
+        self._cleanup()
+
+        for key in keys:
+            self._remove(key)
+
+    def stats(self):
+        """
+        Memory watch: live keys, approximate bytes, evictions + expiry index
+        bookkeeping (heap_size / live / stale / compactions for the heap index).
+        """
+        return {
+            "keys": len(self.store),
+            "bytes": self.total_bytes if self._tracks_bytes else None,
+            "evictions": self.evictions,
+            **self.expiry_index.stats(),
+        }
+
+
+# Background reaper version
+
+
+"""
+Key-Value Store with TTL and a background expiry reaper.
+
+🧠 Intuition
+    In KeyValueStoreImproved every call runs _cleanup() first, so a burst of
+    expirations is paid for by whichever unlucky get() runs next.
+
+    Move that work off the request path:
+    - A reaper thread sleeps until the earliest deadline (next_deadline())
+    - It evicts in bounded batches, releasing the lock between batches
+    - get() / put() become plain O(1) dict operations (+ heap push on put)
+      with a lazy per-key expiry check
+
+⏱ Complexity
+    get / delete: O(1)
+    put: O(log n) heap push, no cleanup
+    Reaper: O(batch_size * log n) per wake-up
+"""
+
+
+class ReapingKeyValueStore(KeyValueStoreImproved):
+    def __init__(self, batch_size=1000, expiry_index=None, **bounds):
+        # bounds: max_bytes / max_entries / eviction_policy ... (see base class)
+        super().__init__(expiry_index, **bounds)
+
+        # Max index entries popped per reaper batch (bounds lock hold time)
+        self.batch_size = batch_size
+
+        # Guards store + expiry index; the condition wakes the reaper early
+        self.lock = threading.Lock()
+        self._wakeup = threading.Condition(self.lock)
+        self._stopped = False
+
+        self._reaper = threading.Thread(target=self._reap_loop, name="kv-reaper", daemon=True)
+        self._reaper.start()
+
+    def _cleanup(self):
+        """
+        Expiry is owned by the reaper thread; the request path never cleans.
+        """
+
+    def _reap_batch(self):
+        """
+        Evict at most batch_size expired index entries. Caller holds self.lock.
+        """
+        for key in self.expiry_index.pop_expired(time.time(), limit=self.batch_size):
+            self._drop(key)
+
+    def _reap_loop(self):
+        while True:
+            with self._wakeup:
+                # Sleep until the earliest deadline (or until put() brings it forward)
+                while not self._stopped:
+                    deadline = self.expiry_index.next_deadline()
+                    if deadline is None:
+                        self._wakeup.wait()
+                        continue
+
+                    delay = deadline - time.time()
+                    if delay <= 0:
+                        break
+                    self._wakeup.wait(timeout=delay)
+
+                if self._stopped:
+                    return
+
+                self._reap_batch()
+
+            # Lock released here, so get/put interleave between batches
+
+    def put(self, key, value, ttl_seconds):
+        with self.lock:
+            earliest = self.expiry_index.next_deadline()
+
+            super().put(key, value, ttl_seconds)
+
+            # New deadline is earlier than the one the reaper sleeps on
+            if earliest is None or self.expiry_index.next_deadline() < earliest:
+                self._wakeup.notify()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.store.get(key)
+
+            # Lazy check: expired but not reaped yet => treat as missing
+            if entry is None or entry.expire_time <= time.time():
+                return None
+
+            self._touch(key, entry)
+            return entry.value
+
+    def delete(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def get_many(self, keys):
+        # One lock acquisition for the whole batch
+        with self.lock:
+            return super().get_many(keys)
+
+    def put_many(self, items, ttl_seconds=None):
+        with self.lock:
+            earliest = self.expiry_index.next_deadline()
+
+            super().put_many(items, ttl_seconds)
+
+            deadline = self.expiry_index.next_deadline()
+            if deadline is not None and (earliest is None or deadline < earliest):
+                self._wakeup.notify()
+
+    def delete_many(self, keys):
+        with self.lock:
+            super().delete_many(keys)
+
+    def stats(self):
+        with self.lock:
+            return super().stats()
+
+    def close(self):
+        """
+        Stop the reaper thread.
+        """
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        self._reaper.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Sharded version
+
+
+"""
+Sharded, lock-striped Key-Value Store with TTL.
+
+🧠 Intuition
+    KeyValueStoreImproved is one dict + one heap with no locking, so a thread
+    pool sharing it either corrupts the heap or queues behind one big lock.
+
+    Split the key space into N independent shards:
+        shard = hash(key) % N
+    Each shard owns its own store dict, expiry index and lock, so two threads
+    only contend when their keys land on the same shard.
+
+⏱ Complexity
+    put / delete: O(log m) where m = entries in the key's shard
+    get: O(1) + amortized cleanup of that shard only
+
+⚠️ Note
+    Under the CPython GIL pure-Python work still runs one thread at a time;
+    sharding removes lock convoying on the single structure, and on
+    free-threaded builds (PEP 703) the shards actually run in parallel.
+"""
+
+
+class ShardedKeyValueStore:
+    def __init__(self, num_shards=16, expiry_index_factory=None):
+        if num_shards <= 0:
+            raise ValueError("num_shards must be positive")
+
+        self.num_shards = num_shards
+
+        # Each shard: its own store dict + expiry index (inside KeyValueStoreImproved)
+        self.shards = [
+            KeyValueStoreImproved(expiry_index_factory() if expiry_index_factory else None)
+            for _ in range(num_shards)
+        ]
+
+        # Lock striping: shard i is guarded by locks[i]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+
+    def _shard_index(self, key):
+        return hash(key) % self.num_shards
+
+    def put(self, key, value, ttl_seconds):
+        index = self._shard_index(key)
+        with self.locks[index]:
+            self.shards[index].put(key, value, ttl_seconds)
+
+    def get(self, key):
+        index = self._shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].get(key)
+
+    def delete(self, key):
+        index = self._shard_index(key)
+        with self.locks[index]:
+            self.shards[index].delete(key)
+
+    def _group_by_shard(self, items, key_of):
+        """
+        shard index -> [(position in input, item)], so each shard's lock is
+        taken once per batch and results can be put back in input order.
+        """
+        groups = {}
+        for position, item in enumerate(items):
+            index = self._shard_index(key_of(item))
+            groups.setdefault(index, []).append((position, item))
+        return groups
+
+    def get_many(self, keys):
+        keys = list(keys)
+        results = [None] * len(keys)
+
+        for index, group in self._group_by_shard(keys, lambda key: key).items():
+            with self.locks[index]:
+                values = self.shards[index].get_many(key for _, key in group)
+            for (position, _), value in zip(group, values):
+                results[position] = value
+
+        return results
+
+    def put_many(self, items, ttl_seconds=None):
+        if isinstance(items, dict):
+            items = items.items()
+
+        for index, group in self._group_by_shard(items, lambda item: item[0]).items():
+            with self.locks[index]:
+                self.shards[index].put_many((item for _, item in group), ttl_seconds)
+
+    def delete_many(self, keys):
+        for index, group in self._group_by_shard(keys, lambda key: key).items():
+            with self.locks[index]:
+                self.shards[index].delete_many(key for _, key in group)
+
+    def __len__(self):
+        total = 0
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                total += len(shard.store)
+        return total
+
+    def stats(self):
+        """
+        Sum of numeric per-shard stats.
+        """
+        totals = {}
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                shard_stats = shard.stats()
+            for name, value in shard_stats.items():
+                if isinstance(value, int):
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+class LockedKeyValueStore:
+    """
+    Baseline for the benchmark: one KeyValueStoreImproved behind one lock.
+    Every thread queues on the same structure.
+    """
+
+    def __init__(self):
+        self.inner = KeyValueStoreImproved()
+        self.lock = threading.Lock()
+
+    def put(self, key, value, ttl_seconds):
+        with self.lock:
+            self.inner.put(key, value, ttl_seconds)
+
+    def get(self, key):
+        with self.lock:
+            return self.inner.get(key)
+
+    def delete(self, key):
+        with self.lock:
+            self.inner.delete(key)
+
+
+def benchmark_thread_scaling(thread_counts=(1, 2, 4, 8, 16), ops_per_thread=50_000,
+                             key_space=100_000, num_shards=16):
+    """
+    Mixed 80% get / 20% put workload from a thread pool.
+    Prints ops/sec for the single-lock store vs the sharded store.
+    """
+    print("threads | single-lock ops/s | sharded ops/s")
+
+    for threads in thread_counts:
+        results = []
+
+        for store in (LockedKeyValueStore(), ShardedKeyValueStore(num_shards)):
+            # Warm up so gets mostly hit
+            for i in range(0, key_space, 10):
+                store.put(f"key-{i}", i, ttl_seconds=60)
+
+            def worker(seed):
+                for i in range(ops_per_thread):
+                    key = f"key-{(seed * 7919 + i * 31) % key_space}"
+                    if i % 5 == 0:
+                        store.put(key, i, ttl_seconds=60)
+                    else:
+                        store.get(key)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(worker, range(threads)))
+            elapsed = time.perf_counter() - start
+
+            results.append(threads * ops_per_thread / elapsed)
+
+        print(f"{threads:7d} | {results[0]:17,.0f} | {results[1]:13,.0f}")
 
 
 # ---------------- TESTING ----------------
@@ -202,3 +734,43 @@ if __name__ == "__main__":
     time.sleep(2)
     print("k1 still valid:", kv.get("k1"))  # "v1"
     print("k2 expired:", kv.get("k2"))  # None
+
+    sharded = ShardedKeyValueStore(num_shards=4)
+    sharded.put("user:1", "alice", ttl_seconds=10)
+    print("Sharded get:", sharded.get("user:1"))  # "alice"
+    sharded.delete("user:1")
+    print("Sharded after delete:", sharded.get("user:1"))  # None
+
+    with ReapingKeyValueStore(batch_size=100) as reaping:
+        reaping.put("token", "xyz", ttl_seconds=1)
+        print("Reaping get:", reaping.get("token"))  # "xyz"
+        time.sleep(1.5)
+        print("Reaped:", reaping.get("token"), len(reaping.store))  # None 0
+
+    bulk = ShardedKeyValueStore(num_shards=4)
+    bulk.put_many({"a": 1, "b": 2, "c": 3}, ttl_seconds=10)
+    bulk.put_many([("d", 4, 10), ("e", 5, 0.1)])  # per-key TTL
+    print("Bulk get:", bulk.get_many(["c", "missing", "a", "d"]))  # [3, None, 1, 4]
+    bulk.delete_many(["a", "c"])
+    print("Bulk after delete:", bulk.get_many(["a", "b", "c"]))  # [None, 2, None]
+
+    bounded = KeyValueStoreImproved(max_entries=2, eviction_policy="lru")
+    bounded.put("a", 1, ttl_seconds=60)
+    bounded.put("b", 2, ttl_seconds=60)
+    bounded.get("a")                      # a is now most recently used
+    bounded.put("c", 3, ttl_seconds=60)   # evicts b
+    print("LRU bounded:", bounded.get_many(["a", "b", "c"]), bounded.stats()["evictions"])  # [1, None, 3] 1
+
+    hot = KeyValueStoreImproved(expiry_index=HeapExpiryIndex(min_compact_size=100))
+    for refresh in range(1000):
+        hot.put(f"session-{refresh % 10}", refresh, ttl_seconds=30)
+    print("Heap stats:", hot.stats())  # heap_size stays bounded, compactions > 0
+
+    wheel_kv = KeyValueStoreImproved(expiry_index=TimingWheelExpiryIndex(tick_seconds=0.05))
+    wheel_kv.put("k", "v", ttl_seconds=0.5)
+    wheel_kv.put("k", "v2", ttl_seconds=0.5)  # replaces, no stale entry
+    print("Wheel get:", wheel_kv.get("k"), len(wheel_kv.expiry_index))  # "v2" 1
+    time.sleep(0.7)
+    print("Wheel expired:", wheel_kv.get("k"), len(wheel_kv.store))  # None 0
+
+    benchmark_thread_scaling()
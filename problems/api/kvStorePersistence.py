@@ -0,0 +1,319 @@
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+try:
+    from problems.api.kvStoreAPI import KeyValueStoreImproved
+except ModuleNotFoundError:
+    # Run as a script (python path/to/this_file.py): the sibling module is on sys.path
+    from kvStoreAPI import KeyValueStoreImproved
+
+"""
+Durable Key-Value Store with TTL (append-only log + snapshots).
+
+🧠 Intuition
+    An in-memory store loses everything on restart, and the cold cache
+    afterwards stampedes whatever sits behind it. Redis-style durability:
+
+    1. Append-only log (AOF)
+       Every put/delete is appended as a record. Puts carry the ABSOLUTE
+       expire_time, so a record replayed after a restart expires at the
+       same wall-clock moment it would have anyway.
+
+    2. Compacted snapshot
+       Every `snapshot_every` records the live entries are written to
+       snapshot.tmp, fsync'd, atomically renamed over `snapshot`, and the
+       log is truncated. The log therefore only holds changes since the
+       last snapshot.
+
+    3. Recovery
+       Load snapshot, replay log, skip already-expired records.
+       A torn record at the tail (crash mid-write) is detected by its
+       length/CRC header and cut off.
+
+Record format:
+    [payload length: u32][crc32(payload): u32][pickle payload]
+    payload = ("put", key, value, expire_time) | ("del", key)
+
+fsync policy (latency vs durability):
+    "always"   - fsync after every record (safest, slowest)
+    "interval" - fsync at most every fsync_interval_ms (lose <= N ms on crash)
+    "never"    - leave it to the OS page cache
+
+Budget evictions (max_bytes / max_entries) are logged as ("del", key) right
+after the put that caused them, and the budget is off while replaying: the
+victims depend on recency from get(), which is not logged, so recovery must
+not pick them again. A delete is logged even when the key is already gone.
+⚠️ After recovery LRU recency is write order, not read order.
+"""
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_HEADER = struct.Struct("<II")
+
+
+def _encode(record):
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_records(path):
+    """
+    Yield records from a log/snapshot file.
+    Returns (via StopIteration value) the offset of the last intact record.
+    """
+    good_offset = 0
+
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                break
+
+            length, checksum = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break  # torn / corrupt tail
+
+            good_offset = f.tell()
+            yield pickle.loads(payload)
+
+    return good_offset
+
+
+class PersistentKeyValueStore(KeyValueStoreImproved):
+    def __init__(self, directory, fsync="interval", fsync_interval_ms=1000,
+                 snapshot_every=100_000, buffer_size=64 * 1024, **options):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+
+        super().__init__(**options)
+
+        # ("del", key) records for budget evictions, not yet logged
+        self._evicted = []
+
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.snapshot_every = snapshot_every
+        self.buffer_size = buffer_size
+
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "appendonly.log")
+        self.snapshot_path = os.path.join(directory, "snapshot")
+
+        self._recover()
+
+        # Buffered append handle: records batch up in user space between syncs
+        self._log = open(self.log_path, "ab", buffering=buffer_size)
+        self._log_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._records_since_snapshot = 0
+        self._closed = False
+
+        # "interval": sync the tail even when writes stop arriving
+        self._flusher = None
+        if fsync == "interval":
+            self._flusher = threading.Thread(target=self._flush_loop, name="kv-aof-flush", daemon=True)
+            self._flusher.start()
+
+        # Budget may be smaller than when the log was written
+        self._enforce_budget()
+        if self._evicted:
+            self._append(self._take_evictions())
+
+    # ---------------- RECOVERY ----------------
+
+    def _replay(self, path):
+        now = time.time()
+        records = _read_records(path)
+
+        while True:
+            try:
+                record = next(records)
+            except StopIteration as done:
+                return done.value
+
+            if record[0] == "put":
+                _, key, value, expire_time = record
+                if expire_time <= now:
+                    # Already expired: skip, and drop any older live version
+                    self._remove(key)
+                else:
+                    self._insert(key, value, expire_time)
+            else:
+                self._remove(record[1])
+
+    def _recover(self):
+        # Evictions are in the log as deletes: replay them, don't redo them
+        budget = self.max_bytes, self.max_entries
+        self.max_bytes = self.max_entries = None
+
+        try:
+            if os.path.exists(self.snapshot_path):
+                self._replay(self.snapshot_path)
+
+            if os.path.exists(self.log_path):
+                good_offset = self._replay(self.log_path)
+
+                # Cut off a torn tail so new records append after intact ones
+                if good_offset < os.path.getsize(self.log_path):
+                    with open(self.log_path, "r+b") as f:
+                        f.truncate(good_offset)
+        finally:
+            self.max_bytes, self.max_entries = budget
+
+    # ---------------- LOGGING ----------------
+
+    def _evict(self, key):
+        super()._evict(key)
+        self._evicted.append(("del", key))
+
+    def _take_evictions(self):
+        evicted, self._evicted = self._evicted, []
+        return evicted
+
+    def _logged_insert(self, records, key, value, expire_time):
+        """
+        Insert and add its put record, then the deletes of any keys it evicted.
+        """
+        self._insert(key, value, expire_time)
+        records.append(("put", key, value, expire_time))
+        records.extend(self._take_evictions())
+
+    def _sync(self):
+        """
+        Push buffered records to the OS and fsync. Caller holds _log_lock.
+        """
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _append(self, records):
+        with self._log_lock:
+            for record in records:
+                self._log.write(_encode(record))
+            self._records_since_snapshot += len(records)
+
+            if self.fsync == "always":
+                self._sync()
+            elif self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+
+        if self.snapshot_every and self._records_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            with self._log_lock:
+                if self._closed:
+                    return
+                if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+
+    def snapshot(self):
+        """
+        Write live entries to a compacted snapshot and truncate the log.
+        """
+        self._cleanup()  # expired keys don't belong in a snapshot
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb", buffering=self.buffer_size) as f:
+            for key, entry in self.store.items():
+                f.write(_encode(("put", key, entry.value, entry.expire_time)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._log_lock:
+            # Atomic swap: a crash leaves either the old or the new snapshot
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Snapshot now covers everything logged so far
+            self._log.close()
+            self._log = open(self.log_path, "wb", buffering=self.buffer_size)
+            self._sync()
+            self._records_since_snapshot = 0
+
+    def close(self):
+        with self._log_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sync()
+            self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------------- PUBLIC API ----------------
+
+    def put(self, key, value, ttl_seconds):
+        self._cleanup()
+
+        records = []
+        self._logged_insert(records, key, value, time.time() + ttl_seconds)
+        self._append(records)
+
+    def delete(self, key):
+        self._cleanup()
+
+        # Logged even if the key is gone: it may live on in older records
+        self._remove(key)
+        self._append([("del", key)])
+
+    def put_many(self, items, ttl_seconds=None):
+        self._cleanup()
+
+        if isinstance(items, dict):
+            items = items.items()
+
+        now = time.time()
+        records = []
+        for item in items:
+            if ttl_seconds is None:
+                key, value, ttl = item
+            else:
+                key, value = item
+                ttl = ttl_seconds
+
+            self._logged_insert(records, key, value, now + ttl)
+
+        self._append(records)
+
+    def delete_many(self, keys):
+        self._cleanup()
+
+        records = []
+        for key in keys:
+            self._remove(key)
+            records.append(("del", key))
+
+        self._append(records)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        with PersistentKeyValueStore(data_dir, fsync="always") as kv:
+            kv.put("session", "abc123", ttl_seconds=60)
+            kv.put("short", "gone soon", ttl_seconds=0.5)
+            kv.put_many({"a": 1, "b": 2}, ttl_seconds=60)
+            kv.delete("a")
+
+        time.sleep(1)
+
+        # "Restart": recovery replays the log, skipping the expired record
+        with PersistentKeyValueStore(data_dir, fsync="never") as kv:
+            print(kv.get_many(["session", "short", "a", "b"]))  # ['abc123', None, None, 2]
+            kv.snapshot()
+            print(os.path.getsize(kv.log_path))  # 0 - log truncated after snapshot
+
+        with PersistentKeyValueStore(data_dir) as kv:
+            print(kv.get("session"), len(kv.store))  # abc123 2
@@ -0,0 +1,425 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+"""
+Memory-mapped segment Key-Value Store with TTL (for multi-GB datasets).
+
+🧠 Intuition
+    KeyValueStoreImproved keeps key -> (value, expire_time) tuples in a dict.
+    For small values the Python object overhead (tuple + float + bytes header)
+    dwarfs the payload, and everything must fit in RAM.
+
+    Bitcask-style layout instead:
+    - Values live on disk in append-only segment files, mmap'd for reading
+    - RAM holds only a compact index:
+          key -> slot
+          slot -> (segment, offset, length, expire_time)
+      stored column-wise in array('I' / 'Q' / 'd') - 24 bytes per key,
+      no per-entry Python objects besides the key itself
+    - get() returns a zero-copy memoryview slice of the mmap
+
+    Overwrites/deletes/expirations leave dead records behind, so a
+    compactor rewrites sealed segments dominated by dead bytes.
+
+Record format (little endian):
+    [expire_time: f64][key_len: u32][value_len: u32][key][value]
+    value_len == TOMBSTONE marks a delete; key_len == 0 marks end of segment
+    (segment files are pre-sized and zero-filled).
+
+⏱ Complexity
+    put / delete: O(1) (append + index update)
+    get: O(1), zero-copy
+    compaction: O(bytes in the segment being rewritten)
+
+⚠️ Values must be bytes-like, keys str or bytes (non-empty).
+   A memoryview returned by get() pins its segment's mmap: a compacted
+   segment is only unmapped once no views into it remain.
+"""
+
+_RECORD_HEADER = struct.Struct("<dII")
+TOMBSTONE = 0xFFFFFFFF
+
+
+class _Segment:
+    def __init__(self, segment_id, path, size):
+        self.segment_id = segment_id
+        self.path = path
+
+        new_file = not os.path.exists(path)
+        with open(path, "a+b") as f:
+            if new_file:
+                f.truncate(size)  # pre-size: zero bytes mark "no more records"
+            self.mm = mmap.mmap(f.fileno(), 0)
+
+        self.size = len(self.mm)
+        self.write_pos = 0      # end of the last record
+        self.dead_bytes = 0     # bytes of superseded / deleted records
+        self.max_expire = 0.0   # every record expired => whole segment dead
+
+    def dead_ratio(self):
+        return self.dead_bytes / self.write_pos if self.write_pos else 0.0
+
+    def records(self):
+        """
+        Yield (offset, record_size, expire_time, key, value_offset, value_len).
+        """
+        pos = 0
+        while pos + _RECORD_HEADER.size <= self.size:
+            expire_time, key_len, value_len = _RECORD_HEADER.unpack_from(self.mm, pos)
+            if key_len == 0:
+                break
+
+            key_start = pos + _RECORD_HEADER.size
+            value_start = key_start + key_len
+            stored_len = 0 if value_len == TOMBSTONE else value_len
+            record_size = _RECORD_HEADER.size + key_len + stored_len
+
+            yield pos, record_size, expire_time, bytes(self.mm[key_start:value_start]), value_start, value_len
+            pos += record_size
+
+    def close(self):
+        """
+        Unmap; raises BufferError while get() views into it are alive.
+        """
+        self.mm.close()
+
+
+class SegmentKeyValueStore:
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, compact_threshold=0.5):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compact_threshold = compact_threshold
+
+        os.makedirs(directory, exist_ok=True)
+
+        # ---------------- COMPACT INDEX ----------------
+        # key (bytes) -> slot; slot -> columns below
+        self._slots = {}
+        self._segment = array("I")
+        self._offset = array("Q")   # offset of the value bytes
+        self._length = array("I")
+        self._expire = array("d")
+        self._record_size = array("I")
+        self._free_slots = []
+
+        self._segments = {}         # segment_id -> _Segment
+        self._retired = []          # compacted, still pinned by live views
+        self._active = None
+
+        self.compactions = 0
+        self.lock = threading.RLock()
+        self._compactor = None
+        self._stop = threading.Event()
+
+        self._recover()
+
+    # ---------------- INDEX HELPERS ----------------
+
+    @staticmethod
+    def _key_bytes(key):
+        key = key.encode() if isinstance(key, str) else bytes(key)
+        if not key:
+            raise ValueError("key must be non-empty")
+        return key
+
+    def _forget(self, key):
+        """
+        Drop key from the index; its record becomes dead bytes.
+        """
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+
+        segment = self._segments.get(self._segment[slot])
+        if segment is not None:
+            segment.dead_bytes += self._record_size[slot]
+        self._free_slots.append(slot)
+
+    def _point(self, key, segment_id, value_offset, value_len, expire_time, record_size):
+        self._forget(key)
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._segment[slot] = segment_id
+            self._offset[slot] = value_offset
+            self._length[slot] = value_len
+            self._expire[slot] = expire_time
+            self._record_size[slot] = record_size
+        else:
+            slot = len(self._segment)
+            self._segment.append(segment_id)
+            self._offset.append(value_offset)
+            self._length.append(value_len)
+            self._expire.append(expire_time)
+            self._record_size.append(record_size)
+
+        self._slots[key] = slot
+
+    # ---------------- SEGMENTS ----------------
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.directory, f"{segment_id:08d}.seg")
+
+    def _roll(self):
+        """
+        Seal the active segment and open a fresh one.
+        """
+        if self._active is not None:
+            self._active.mm.flush()
+
+        segment_id = max(self._segments, default=0) + 1
+        self._active = _Segment(segment_id, self._segment_path(segment_id), self.segment_size)
+        self._segments[segment_id] = self._active
+
+    def _append(self, key, value, expire_time, tombstone=False):
+        """
+        Append one record to the active segment; returns (segment_id, value_offset, record_size).
+        """
+        value_len = TOMBSTONE if tombstone else len(value)
+        record_size = _RECORD_HEADER.size + len(key) + (0 if tombstone else len(value))
+
+        if record_size > self.segment_size:
+            raise ValueError("record larger than segment_size")
+
+        if self._active is None or self._active.write_pos + record_size > self._active.size:
+            self._roll()
+
+        segment = self._active
+        pos = segment.write_pos
+        _RECORD_HEADER.pack_into(segment.mm, pos, expire_time, len(key), value_len)
+
+        key_start = pos + _RECORD_HEADER.size
+        value_start = key_start + len(key)
+        segment.mm[key_start:value_start] = key
+        if not tombstone:
+            segment.mm[value_start:value_start + len(value)] = value
+
+        segment.write_pos = pos + record_size
+        segment.max_expire = max(segment.max_expire, expire_time)
+        return segment.segment_id, value_start, record_size
+
+    def _recover(self):
+        now = time.time()
+        segment_ids = sorted(
+            int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".seg")
+        )
+
+        for segment_id in segment_ids:
+            segment = _Segment(segment_id, self._segment_path(segment_id), self.segment_size)
+            self._segments[segment_id] = segment
+
+            for pos, record_size, expire_time, key, value_start, value_len in segment.records():
+                segment.write_pos = pos + record_size
+                segment.max_expire = max(segment.max_expire, expire_time)
+
+                if value_len == TOMBSTONE or expire_time <= now:
+                    # Delete, or a put that already expired: either way gone
+                    self._forget(key)
+                    segment.dead_bytes += record_size
+                else:
+                    self._point(key, segment_id, value_start, value_len, expire_time, record_size)
+
+            self._active = segment
+
+    # ---------------- PUBLIC API ----------------
+
+    def put(self, key, value, ttl_seconds):
+        key = self._key_bytes(key)
+        value = memoryview(value).cast("B")
+        expire_time = time.time() + ttl_seconds
+
+        with self.lock:
+            segment_id, value_offset, record_size = self._append(key, value, expire_time)
+            self._point(key, segment_id, value_offset, len(value), expire_time, record_size)
+
+    def get(self, key):
+        """
+        Zero-copy memoryview of the value, or None if missing/expired.
+        """
+        key = self._key_bytes(key)
+
+        with self.lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+
+            if self._expire[slot] <= time.time():
+                # Lazy expiry: the record turns into dead bytes for the compactor
+                self._forget(key)
+                return None
+
+            offset = self._offset[slot]
+            segment = self._segments[self._segment[slot]]
+            # Read-only: a caller writing through the view would corrupt the record
+            return memoryview(segment.mm)[offset:offset + self._length[slot]].toreadonly()
+
+    def delete(self, key):
+        key = self._key_bytes(key)
+
+        with self.lock:
+            if key not in self._slots:
+                return
+
+            self._forget(key)
+            # Tombstone so recovery doesn't resurrect the old record
+            _, _, record_size = self._append(key, b"", 0.0, tombstone=True)
+            self._active.dead_bytes += record_size
+
+    def __len__(self):
+        return len(self._slots)
+
+    # ---------------- COMPACTION ----------------
+
+    def _compact_segment(self, segment):
+        """
+        Copy live records of a sealed segment into the active one, then drop it.
+        """
+        now = time.time()
+        has_older = any(segment_id < segment.segment_id for segment_id in self._segments)
+        buried = set()
+
+        def bury(key):
+            """
+            Dropping this segment's record of a key that isn't live must not
+            let an older segment's put for it resurface on recovery.
+            """
+            if has_older and key not in self._slots and key not in buried:
+                _, _, size = self._append(key, b"", 0.0, tombstone=True)
+                self._active.dead_bytes += size
+                buried.add(key)
+
+        for pos, record_size, expire_time, key, value_start, value_len in segment.records():
+            if value_len == TOMBSTONE:
+                # Still needed only while an older segment may hold a put for
+                # this key, and only if the key wasn't re-put since
+                bury(key)
+                continue
+
+            slot = self._slots.get(key)
+            is_current = (
+                slot is not None
+                and self._segment[slot] == segment.segment_id
+                and self._offset[slot] == value_start
+            )
+            if not is_current:
+                # Superseded by a newer record (nothing to do), or forgotten
+                # by delete / lazy expiry in get() - the latter has no tombstone
+                if slot is None:
+                    bury(key)
+                continue
+
+            if expire_time <= now:
+                self._forget(key)
+                bury(key)
+                continue
+
+            value = segment.mm[value_start:value_start + value_len]
+            segment_id, value_offset, size = self._append(key, value, expire_time)
+            self._point(key, segment_id, value_offset, value_len, expire_time, size)
+
+        del self._segments[segment.segment_id]
+        os.remove(segment.path)
+        self._retired.append(segment)
+        self.compactions += 1
+
+    def _release_retired(self):
+        still_pinned = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                still_pinned.append(segment)  # a get() view is still alive
+        self._retired = still_pinned
+
+    def compact(self):
+        """
+        Rewrite every sealed segment whose dead (overwritten / deleted /
+        expired) share passes compact_threshold.
+        """
+        with self.lock:
+            now = time.time()
+
+            for segment in sorted(self._segments.values(), key=lambda s: s.segment_id):
+                if segment is self._active:
+                    continue
+
+                if segment.max_expire <= now or segment.dead_ratio() >= self.compact_threshold:
+                    self._compact_segment(segment)
+
+            self._release_retired()
+
+    def _compact_loop(self, interval_seconds):
+        while not self._stop.wait(interval_seconds):
+            self.compact()
+
+    def start_compactor(self, interval_seconds=30.0):
+        """
+        Run compact() periodically on a background thread.
+        """
+        self._compactor = threading.Thread(
+            target=self._compact_loop, args=(interval_seconds,), name="kv-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def close(self):
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+
+        with self.lock:
+            for segment in self._segments.values():
+                segment.mm.flush()
+                try:
+                    segment.close()
+                except BufferError:
+                    pass  # caller still holds views; unmapped when they are released
+            self._release_retired()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self):
+        with self.lock:
+            index_bytes = sum(
+                column.buffer_info()[1] * column.itemsize
+                for column in (self._segment, self._offset, self._length, self._expire, self._record_size)
+            )
+            return {
+                "keys": len(self._slots),
+                "segments": len(self._segments),
+                "disk_bytes": sum(s.write_pos for s in self._segments.values()),
+                "dead_bytes": sum(s.dead_bytes for s in self._segments.values()),
+                "index_column_bytes": index_bytes,
+                "compactions": self.compactions,
+            }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        with SegmentKeyValueStore(data_dir, segment_size=4096) as kv:
+            kv.put("user:1", b"alice", ttl_seconds=60)
+            view = kv.get("user:1")
+            print(bytes(view), type(view).__name__)  # b'alice' memoryview
+            del view
+
+            # Overwrite-heavy: old records pile up as dead bytes
+            for i in range(500):
+                kv.put(f"counter:{i % 5}", str(i).encode(), ttl_seconds=60)
+            kv.delete("counter:0")
+            print(kv.stats())
+
+            kv.compact()
+            print(kv.stats())  # fewer segments, dead bytes reclaimed
+
+        # Restart: index rebuilt from segment files, tombstone respected
+        with SegmentKeyValueStore(data_dir, segment_size=4096) as kv:
+            print(bytes(kv.get("counter:4")), kv.get("counter:0"), len(kv))  # b'499' None 5